@@ -0,0 +1,46 @@
+"""add document number series table
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    # 採番カウンターテーブル
+    op.create_table(
+        'document_number_series',
+        sa.Column('document_type', sa.String(), nullable=False),
+        sa.Column('prefix', sa.String(), nullable=False),
+        sa.Column('period', sa.String(), nullable=False, server_default=''),
+        sa.Column('next_value', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('document_type', 'prefix', 'period')
+    )
+
+    # 既存の番号（旧形式 PREFIX-NNNN）の続きから採番されるよう初期値を設定する
+    for document_type, table, column, prefix in (
+        ('invoice', 'invoices', 'invoice_number', 'INV'),
+        ('quotation', 'quotations', 'quotation_number', 'Q'),
+    ):
+        op.execute(
+            f"""
+            INSERT INTO document_number_series (document_type, prefix, period, next_value)
+            SELECT '{document_type}', '{prefix}', '',
+                   MAX(CAST(split_part({column}, '-', 2) AS INTEGER)) + 1
+            FROM {table}
+            WHERE {column} ~ '^{prefix}-[0-9]+$'
+            HAVING COUNT(*) > 0
+            """
+        )
+
+def downgrade() -> None:
+    op.drop_table('document_number_series')
@@ -0,0 +1,47 @@
+"""add amount_paid and balance_due to invoices
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column(
+        'invoices',
+        sa.Column('amount_paid', sa.Float(), nullable=False, server_default='0')
+    )
+    op.add_column('invoices', sa.Column('balance_due', sa.Float(), nullable=True))
+
+    # 既存の入金履歴から入金累計と残高を算出する
+    op.execute(
+        """
+        UPDATE invoices
+        SET amount_paid = COALESCE(paid.total, 0),
+            balance_due = invoices.total_amount - COALESCE(paid.total, 0)
+        FROM invoices AS target
+        LEFT JOIN (
+            SELECT invoice_id, SUM(payment_amount) AS total
+            FROM payments
+            GROUP BY invoice_id
+        ) AS paid ON paid.invoice_id = target.id
+        WHERE target.id = invoices.id
+        """
+    )
+
+    op.create_index(
+        'ix_invoices_customer_id_balance_due', 'invoices', ['customer_id', 'balance_due']
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_customer_id_balance_due', table_name='invoices')
+    op.drop_column('invoices', 'balance_due')
+    op.drop_column('invoices', 'amount_paid')
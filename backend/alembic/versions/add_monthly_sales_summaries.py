@@ -0,0 +1,71 @@
+"""add monthly sales summary tables
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_table(
+        'monthly_product_sales',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('customer_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('invoice_count', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('subtotal', sa.Float(), nullable=False),
+        sa.Column('tax_amount', sa.Float(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('month', 'customer_id', 'product_id'),
+    )
+    op.create_table(
+        'monthly_customer_sales',
+        sa.Column('month', sa.Date(), nullable=False),
+        sa.Column('customer_id', sa.String(), nullable=False),
+        sa.Column('invoice_count', sa.Integer(), nullable=False),
+        sa.Column('subtotal', sa.Float(), nullable=False),
+        sa.Column('tax_amount', sa.Float(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('amount_paid', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('month', 'customer_id'),
+    )
+
+    # 既存の発行済み請求書から集計する（以降は python -m app.sales_summary で再構築できる）
+    op.execute(
+        """
+        INSERT INTO monthly_product_sales
+        SELECT date_trunc('month', i.invoice_date)::date, i.customer_id, it.product_id,
+               COUNT(DISTINCT i.id), COALESCE(SUM(it.quantity), 0),
+               COALESCE(SUM(it.subtotal), 0), COALESCE(SUM(it.tax_amount), 0),
+               COALESCE(SUM(it.total_amount), 0)
+        FROM invoices AS i
+        JOIN invoice_items AS it ON it.invoice_id = i.id
+        WHERE i.status = 'issued' AND i.invoice_date IS NOT NULL
+          AND i.customer_id IS NOT NULL AND it.product_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO monthly_customer_sales
+        SELECT date_trunc('month', invoice_date)::date, customer_id, COUNT(*),
+               COALESCE(SUM(subtotal), 0), COALESCE(SUM(tax_amount), 0),
+               COALESCE(SUM(total_amount), 0), COALESCE(SUM(amount_paid), 0)
+        FROM invoices
+        WHERE status = 'issued' AND invoice_date IS NOT NULL AND customer_id IS NOT NULL
+        GROUP BY 1, 2
+        """
+    )
+
+def downgrade() -> None:
+    op.drop_table('monthly_customer_sales')
+    op.drop_table('monthly_product_sales')
@@ -0,0 +1,21 @@
+"""add tax_rate_name to products
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('tax_rate_name', sa.String(), nullable=True))
+
+def downgrade() -> None:
+    op.drop_column('products', 'tax_rate_name')
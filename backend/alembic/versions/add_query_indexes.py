@@ -0,0 +1,48 @@
+"""add indexes for list and detail query shapes
+
+Revision ID: 002
+Revises: 001a
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001a'
+branch_labels = None
+depends_on = None
+
+# (インデックス名, テーブル, カラム)
+# 一覧取得のフィルタ + created_at ソート（id はキーセットページネーションのタイブレーカー）、
+# 明細・支払いの親ID取得、承認待ち一覧の approver_id + status に対応する
+INDEXES = [
+    ('ix_customers_status_created_at', 'customers', ['status', 'created_at', 'id']),
+    ('ix_customers_created_at', 'customers', ['created_at', 'id']),
+    ('ix_products_status_created_at', 'products', ['status', 'created_at', 'id']),
+    ('ix_products_category_created_at', 'products', ['category', 'created_at', 'id']),
+    ('ix_products_created_at', 'products', ['created_at', 'id']),
+    ('ix_quotations_status_created_at', 'quotations', ['status', 'created_at', 'id']),
+    ('ix_quotations_customer_id_created_at', 'quotations', ['customer_id', 'created_at', 'id']),
+    ('ix_quotations_approver_id_status', 'quotations', ['approver_id', 'status']),
+    ('ix_quotations_created_at', 'quotations', ['created_at', 'id']),
+    (
+        'ix_quotation_items_quotation_id_sort_order',
+        'quotation_items',
+        ['quotation_id', 'sort_order'],
+    ),
+    ('ix_invoices_status_created_at', 'invoices', ['status', 'created_at', 'id']),
+    ('ix_invoices_customer_id_created_at', 'invoices', ['customer_id', 'created_at', 'id']),
+    ('ix_invoices_approver_id_status', 'invoices', ['approver_id', 'status']),
+    ('ix_invoices_created_at', 'invoices', ['created_at', 'id']),
+    ('ix_invoice_items_invoice_id_sort_order', 'invoice_items', ['invoice_id', 'sort_order']),
+    ('ix_payments_invoice_id', 'payments', ['invoice_id']),
+]
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,25 @@
+"""add covering index for sales reports
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_invoices_status_invoice_date',
+        'invoices',
+        ['status', 'invoice_date'],
+        postgresql_include=['customer_id', 'subtotal', 'tax_amount', 'total_amount'],
+    )
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_status_invoice_date', table_name='invoices')
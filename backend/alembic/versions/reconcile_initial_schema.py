@@ -0,0 +1,54 @@
+"""rename and add the columns later migrations expect from the initial schema
+
+Revision ID: 001a
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '001a'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+# 001 はアプリケーションのモデルと一部の列名が異なり、以降のマイグレーションが参照する列
+# （002 の approver_id / sort_order、004 の payment_amount、008・009 の invoice_date と
+# 明細の金額列）が存在しないため、それらの列だけをモデルの定義に合わせる。
+
+# (テーブル, 001 の列名, モデルの列名)
+RENAMES = [
+    ('quotations', 'approved_by', 'approver_id'),
+    ('invoices', 'approved_by', 'approver_id'),
+    ('invoices', 'issue_date', 'invoice_date'),
+    ('invoice_items', 'amount', 'subtotal'),
+    ('payments', 'amount', 'payment_amount'),
+]
+
+# (テーブル, 列) 001 にない列
+ADDED_COLUMNS = [
+    ('quotation_items', sa.Column('sort_order', sa.Integer(), nullable=True)),
+    ('invoice_items', sa.Column('sort_order', sa.Integer(), nullable=True)),
+    ('invoice_items', sa.Column('tax_amount', sa.Float(), nullable=True)),
+    ('invoice_items', sa.Column('total_amount', sa.Float(), nullable=True)),
+]
+
+def upgrade() -> None:
+    for table, old_name, new_name in RENAMES:
+        op.alter_column(table, old_name, new_column_name=new_name)
+    for table, column in ADDED_COLUMNS:
+        op.add_column(table, column)
+
+    # 001 の明細は税抜金額のみ保持していた
+    op.execute(
+        "UPDATE invoice_items SET tax_amount = 0, total_amount = subtotal "
+        "WHERE total_amount IS NULL"
+    )
+
+def downgrade() -> None:
+    for table, column in reversed(ADDED_COLUMNS):
+        op.drop_column(table, column.name)
+    for table, old_name, new_name in reversed(RENAMES):
+        op.alter_column(table, new_name, new_column_name=old_name)
@@ -1,5 +1,7 @@
 from fastapi import APIRouter
-from .endpoints import auth, users, customers, products, quotations, invoices, settings
+from .endpoints import (
+    auth, users, customers, products, quotations, invoices, settings, admin, reports
+)
 
 api_router = APIRouter()
 
@@ -22,4 +24,10 @@ api_router.include_router(quotations.router, prefix="/quotations", tags=["見積
 api_router.include_router(invoices.router, prefix="/invoices", tags=["請求書"])
 
 # システム設定関連のエンドポイント
-api_router.include_router(settings.router, prefix="/settings", tags=["システム設定"]) 
\ No newline at end of file
+api_router.include_router(settings.router, prefix="/settings", tags=["システム設定"]) 
+
+# レポート関連のエンドポイント
+api_router.include_router(reports.router, prefix="/reports", tags=["レポート"])
+
+# 管理・運用関連のエンドポイント
+api_router.include_router(admin.router, prefix="/admin", tags=["管理"])
@@ -0,0 +1,123 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+
+from ... import models
+from ...auth import get_current_active_user, principal_cache, token_cache, token_versions
+from ...counting import count_cache
+from ...database import async_pool_stats, get_db, get_pool_status, pool_stats
+from ...hashing import password_pool
+from ...reference_data import notify_changed, reference_data
+from ...sales_tax import NOTIFY_PAYLOAD, sales_tax_rates
+
+router = APIRouter()
+
+@router.get("/db-pool")
+def read_db_pool_status(
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    データベースコネクションプールの設定と統計情報を取得します。
+    管理者権限が必要です。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return get_pool_status()
+
+@router.post("/db-pool/reset")
+def reset_db_pool_stats(
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    コネクションプールの待ち時間統計をリセットします。
+    管理者権限が必要です。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    pool_stats.reset()
+    async_pool_stats.reset()
+    return get_pool_status()
+
+@router.get("/caches")
+def read_cache_stats(
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    プロセス内キャッシュのヒット率などの統計情報を取得します。
+    管理者権限が必要です。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return {
+        "principal": principal_cache.stats(),
+        "tokens": token_cache.stats(),
+        "list_counts": count_cache.stats(),
+        "token_versions": token_versions.stats(),
+        "reference_data": reference_data.stats(),
+    }
+
+@router.get("/password-hash-pool")
+def read_password_hash_pool_stats(
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    パスワードハッシュ用ワーカープールの待ち行列と処理時間の統計情報を取得します。
+    管理者権限が必要です。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return password_pool.stats()
+
+@router.get("/sales-tax")
+def read_sales_tax_status(
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    米国売上税の管轄区域別税率テーブルの読み込み状況を取得します。
+    管理者権限が必要です。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return sales_tax_rates.stats()
+
+@router.post("/sales-tax/reload", status_code=status.HTTP_202_ACCEPTED)
+def reload_sales_tax(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Dict[str, Any]:
+    """
+    管轄区域別税率の CSV を全ワーカーで再読み込みします。
+    管理者権限が必要です。
+    読み込みはバックグラウンドで行われ、完了までは現在のテーブルが使われます。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if not sales_tax_rates.path:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SALES_TAX_RATES_CSV is not configured",
+        )
+    # 自ワーカーは即座に開始し、他のワーカーには NOTIFY で伝える
+    sales_tax_rates.reload_in_background()
+    notify_changed(db, NOTIFY_PAYLOAD)
+    db.commit()
+    return sales_tax_rates.stats()
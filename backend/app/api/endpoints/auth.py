@@ -2,27 +2,29 @@ from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from ... import crud, models, schemas
-from ...database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from ... import models, schemas
+from ...database import get_async_db
 from ...auth import (
     authenticate_user,
     create_access_token,
     get_current_active_user,
+    token_claims,
+    token_versions,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
 
 router = APIRouter()
 
 @router.post("/login", response_model=schemas.Token)
-def login_access_token(
-    db: Session = Depends(get_db),
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
 ) -> Any:
     """
     OAuth2互換のトークンログインを取得します。
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -34,17 +36,22 @@ def login_access_token(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Inactive user",
         )
+    token_versions.record(user.id, user.token_version, user.is_active)
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
+            data=token_claims(user), expires_delta=access_token_expires
         ),
         "token_type": "bearer",
     }
 
 @router.post("/test-token", response_model=schemas.User)
-def test_token(current_user: models.User = Depends(get_current_active_user)) -> Any:
+async def test_token(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_active_user),
+) -> Any:
     """
     現在のアクセストークンをテストします。
     """
-    return current_user 
\ No newline at end of file
+    # 権限埋め込みトークンの場合 current_user はトークンの内容のみを持つため、DB から読み直す
+    return await db.get(models.User, current_user.id) 
\ No newline at end of file
@@ -1,34 +1,47 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ... import crud, models, schemas
-from ...database import get_db
+from ... import async_crud, crud, models, schemas
+from ...database import get_async_db, get_db
 from ...auth import get_current_active_user
+from ...counting import CountStrategy, count_rows
+from ...csv_import import import_csv
+from ...pagination import build_page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Customer])
-def read_customers(
+@router.get("/", response_model=schemas.Page[schemas.Customer])
+async def read_customers(
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: CountStrategy = "cached",
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     顧客一覧を取得します。
+    cursor を指定するとキーセット方式で続きのページを取得し、skip は無視されます。
+    count で総件数の取得方法（cached / exact / estimated / none）を選択できます。
     """
-    customers = crud.get_customers(
+    customers = await async_crud.get_customers(
         db,
         skip=skip,
         limit=limit,
         sort_by=sort_by,
         sort_order=sort_order,
         status=status,
+        cursor=cursor,
+    )
+    total, estimated = await count_rows(
+        db, models.Customer, {"status": status}, count
     )
-    return customers
+    return build_page(customers, skip, limit, sort_by, cursor, total, estimated)
 
 @router.post("/", response_model=schemas.Customer)
 def create_customer(
@@ -41,16 +54,35 @@ def create_customer(
     """
     return crud.create_customer(db=db, customer=customer, user_id=current_user.id)
 
+@router.post("/import", response_model=schemas.ImportReport)
+def import_customers(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    CSV ファイルから顧客を一括登録します。
+    管理者権限が必要です。
+    各行は顧客作成と同じ検証を行い、不正な行は rejected_rows として返します。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return import_csv(db, "customers", stream, user_id=current_user.id)
+
 @router.get("/{customer_id}", response_model=schemas.Customer)
-def read_customer(
+async def read_customer(
     customer_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの顧客情報を取得します。
     """
-    db_customer = crud.get_customer(db, customer_id=customer_id)
+    db_customer = await async_crud.get_customer(db, customer_id=customer_id)
     if db_customer is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,27 +1,35 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ... import crud, models, schemas
-from ...database import get_db
+from ... import async_crud, crud, models, schemas
+from ...database import get_async_db, get_db
 from ...auth import get_current_active_user
+from ...counting import CountStrategy, count_rows
+from ...idempotency import run_idempotent
+from ...pagination import build_page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Invoice])
-def read_invoices(
+@router.get("/", response_model=schemas.Page[schemas.Invoice])
+async def read_invoices(
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: CountStrategy = "cached",
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     請求書一覧を取得します。
+    cursor を指定するとキーセット方式で続きのページを取得し、skip は無視されます。
+    count で総件数の取得方法（cached / exact / estimated / none）を選択できます。
     """
-    invoices = crud.get_invoices(
+    invoices = await async_crud.get_invoices(
         db,
         skip=skip,
         limit=limit,
@@ -29,36 +37,161 @@ def read_invoices(
         sort_order=sort_order,
         status=status,
         customer_id=customer_id,
+        cursor=cursor,
+    )
+    total, estimated = await count_rows(
+        db, models.Invoice, {"status": status, "customer_id": customer_id}, count
     )
-    return invoices
+    return build_page(invoices, skip, limit, sort_by, cursor, total, estimated)
 
 @router.post("/", response_model=schemas.Invoice)
 def create_invoice(
     invoice: schemas.InvoiceCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     新しい請求書を作成します。
     請求書作成権限が必要です。
+    Idempotency-Key ヘッダーを指定した再送には、初回のレスポンスをそのまま返します。
     """
     if not current_user.create_invoice_permission:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
-    return crud.create_invoice(db=db, invoice=invoice, user_id=current_user.id)
+    return run_idempotent(
+        db,
+        key=idempotency_key,
+        user_id=current_user.id,
+        scope="invoices:create",
+        payload=invoice,
+        response_model=schemas.Invoice,
+        operation=lambda: crud.create_invoice(db=db, invoice=invoice, user_id=current_user.id),
+    )
+
+@router.post("/batch", response_model=schemas.InvoiceBatchResponse)
+def create_invoices_batch(
+    batch: schemas.InvoiceBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の請求書を一括で作成します。
+    請求書作成権限が必要です。
+    顧客・商品の存在確認はまとめて行い、番号の払い出しと登録はチャンク単位の
+    トランザクションで実行します。チャンクの登録に失敗した場合は 1 件ずつ登録し直し、
+    失敗した請求書のみエラー内容とともに返します。結果は請求書ごとの成否として返します。
+    """
+    if not current_user.create_invoice_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(batch.invoices) > crud.INVOICE_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch size exceeds {crud.INVOICE_BATCH_MAX_SIZE}",
+        )
+    results = crud.create_invoices_batch(db=db, invoices=batch.invoices, user_id=current_user.id)
+    created = sum(1 for result in results if result["success"])
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+@router.post("/bulk/request-approval", response_model=schemas.BulkTransitionResponse)
+def bulk_request_invoice_approval(
+    request: schemas.BulkApprovalRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の請求書をまとめて承認依頼します。
+    請求書作成権限が必要です。
+    下書き状態の請求書のみ遷移し、それ以外は skipped として返します。
+    """
+    if not current_user.create_invoice_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(request.ids) > crud.BULK_TRANSITION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk size exceeds {crud.BULK_TRANSITION_MAX_SIZE}",
+        )
+    return crud.bulk_request_invoice_approval(
+        db=db,
+        invoice_ids=request.ids,
+        approver_id=request.approver_id,
+        notes=request.notes,
+    )
+
+@router.post("/bulk/approve", response_model=schemas.BulkTransitionResponse)
+def bulk_approve_invoices(
+    request: schemas.BulkTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の請求書をまとめて承認します。
+    請求書承認権限が必要です。
+    承認待ちの請求書のみ遷移し、それ以外は skipped として返します。
+    """
+    if not current_user.approve_invoice_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(request.ids) > crud.BULK_TRANSITION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk size exceeds {crud.BULK_TRANSITION_MAX_SIZE}",
+        )
+    return crud.bulk_approve_invoices(
+        db=db,
+        invoice_ids=request.ids,
+        approver_id=current_user.id,
+        notes=request.notes,
+    )
+
+@router.post("/bulk/issue", response_model=schemas.BulkTransitionResponse)
+def bulk_issue_invoices(
+    request: schemas.BulkTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の請求書をまとめて発行します。
+    請求書作成権限が必要です。
+    承認済みの請求書のみ遷移し、それ以外は skipped として返します。
+    """
+    if not current_user.create_invoice_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(request.ids) > crud.BULK_TRANSITION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk size exceeds {crud.BULK_TRANSITION_MAX_SIZE}",
+        )
+    return crud.bulk_issue_invoices(
+        db=db,
+        invoice_ids=request.ids,
+        user_id=current_user.id,
+        notes=request.notes,
+    )
 
 @router.get("/{invoice_id}", response_model=schemas.Invoice)
-def read_invoice(
+async def read_invoice(
     invoice_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの請求書情報を取得します。
     """
-    db_invoice = crud.get_invoice(db, invoice_id=invoice_id)
+    db_invoice = await async_crud.get_invoice(db, invoice_id=invoice_id)
     if db_invoice is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -207,32 +340,48 @@ def issue_invoice(
 def register_payment(
     invoice_id: str,
     payment: schemas.PaymentCreate,
+    idempotency_key: Optional[str] = Header(None, max_length=255),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの請求書に支払いを登録します。
     収益管理権限が必要です。
+    Idempotency-Key ヘッダーを指定した再送には、初回のレスポンスをそのまま返します。
     """
     if not current_user.manage_revenue_permission:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
-    db_invoice = crud.get_invoice(db, invoice_id=invoice_id)
-    if db_invoice is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
-        )
-    if db_invoice.status != "issued":
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Can only register payments for issued invoices",
+
+    def operation() -> models.Payment:
+        # 請求書の状態は入金を反映する UPDATE の条件で確認する（再送と状態変更が競合しても
+        # 入金の可否は UPDATE 時点の状態で決まる）
+        db_payment = crud.register_payment(
+            db=db,
+            invoice_id=invoice_id,
+            payment=payment,
+            user_id=current_user.id,
         )
-    return crud.register_payment(
-        db=db,
-        invoice_id=invoice_id,
-        payment=payment,
+        if db_payment is None:
+            if crud.get_invoice_status(db, invoice_id=invoice_id) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Invoice not found",
+                )
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Can only register payments for issued invoices",
+            )
+        return db_payment
+
+    return run_idempotent(
+        db,
+        key=idempotency_key,
         user_id=current_user.id,
-    ) 
\ No newline at end of file
+        scope=f"invoices:{invoice_id}:payments",
+        payload=payment,
+        response_model=schemas.Payment,
+        operation=operation,
+    )
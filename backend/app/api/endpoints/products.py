@@ -1,27 +1,36 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from typing import Optional
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ... import crud, models, schemas
-from ...database import get_db
+from ... import async_crud, crud, models, schemas
+from ...database import get_async_db, get_db
 from ...auth import get_current_active_user
+from ...counting import CountStrategy, count_rows
+from ...csv_import import import_csv
+from ...pagination import build_page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Product])
-def read_products(
+@router.get("/", response_model=schemas.Page[schemas.Product])
+async def read_products(
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     category: Optional[str] = None,
     status: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: CountStrategy = "cached",
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     商品一覧を取得します。
+    cursor を指定するとキーセット方式で続きのページを取得し、skip は無視されます。
+    count で総件数の取得方法（cached / exact / estimated / none）を選択できます。
     """
-    products = crud.get_products(
+    products = await async_crud.get_products(
         db,
         skip=skip,
         limit=limit,
@@ -29,8 +38,12 @@ def read_products(
         sort_order=sort_order,
         category=category,
         status=status,
+        cursor=cursor,
+    )
+    total, estimated = await count_rows(
+        db, models.Product, {"category": category, "status": status}, count
     )
-    return products
+    return build_page(products, skip, limit, sort_by, cursor, total, estimated)
 
 @router.post("/", response_model=schemas.Product)
 def create_product(
@@ -49,16 +62,35 @@ def create_product(
         )
     return crud.create_product(db=db, product=product, user_id=current_user.id)
 
+@router.post("/import", response_model=schemas.ImportReport)
+def import_products(
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    CSV ファイルから商品を一括登録します。
+    管理者権限が必要です。
+    各行は商品作成と同じ検証を行い、不正な行は rejected_rows として返します。
+    """
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    return import_csv(db, "products", stream, user_id=current_user.id)
+
 @router.get("/{product_id}", response_model=schemas.Product)
-def read_product(
+async def read_product(
     product_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの商品情報を取得します。
     """
-    db_product = crud.get_product(db, product_id=product_id)
+    db_product = await async_crud.get_product(db, product_id=product_id)
     if db_product is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
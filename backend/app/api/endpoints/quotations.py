@@ -1,27 +1,34 @@
-from typing import List, Optional
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ... import crud, models, schemas
-from ...database import get_db
+from ... import async_crud, crud, models, schemas
+from ...database import get_async_db, get_db
 from ...auth import get_current_active_user
+from ...counting import CountStrategy, count_rows
+from ...pagination import build_page
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Quotation])
-def read_quotations(
+@router.get("/", response_model=schemas.Page[schemas.Quotation])
+async def read_quotations(
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    count: CountStrategy = "cached",
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     見積書一覧を取得します。
+    cursor を指定するとキーセット方式で続きのページを取得し、skip は無視されます。
+    count で総件数の取得方法（cached / exact / estimated / none）を選択できます。
     """
-    quotations = crud.get_quotations(
+    quotations = await async_crud.get_quotations(
         db,
         skip=skip,
         limit=limit,
@@ -29,8 +36,12 @@ def read_quotations(
         sort_order=sort_order,
         status=status,
         customer_id=customer_id,
+        cursor=cursor,
+    )
+    total, estimated = await count_rows(
+        db, models.Quotation, {"status": status, "customer_id": customer_id}, count
     )
-    return quotations
+    return build_page(quotations, skip, limit, sort_by, cursor, total, estimated)
 
 @router.post("/", response_model=schemas.Quotation)
 def create_quotation(
@@ -49,16 +60,72 @@ def create_quotation(
         )
     return crud.create_quotation(db=db, quotation=quotation, user_id=current_user.id)
 
+@router.post("/bulk/request-approval", response_model=schemas.BulkTransitionResponse)
+def bulk_request_quotation_approval(
+    request: schemas.BulkApprovalRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の見積書をまとめて承認依頼します。
+    見積書作成権限が必要です。
+    下書き状態の見積書のみ遷移し、それ以外は skipped として返します。
+    """
+    if not current_user.create_quote_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(request.ids) > crud.BULK_TRANSITION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk size exceeds {crud.BULK_TRANSITION_MAX_SIZE}",
+        )
+    return crud.bulk_request_quotation_approval(
+        db=db,
+        quotation_ids=request.ids,
+        approver_id=request.approver_id,
+        notes=request.notes,
+    )
+
+@router.post("/bulk/approve", response_model=schemas.BulkTransitionResponse)
+def bulk_approve_quotations(
+    request: schemas.BulkTransitionRequest,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    複数の見積書をまとめて承認します。
+    見積書承認権限が必要です。
+    承認待ちの見積書のみ遷移し、それ以外は skipped として返します。
+    """
+    if not current_user.approve_quote_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if len(request.ids) > crud.BULK_TRANSITION_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Bulk size exceeds {crud.BULK_TRANSITION_MAX_SIZE}",
+        )
+    return crud.bulk_approve_quotations(
+        db=db,
+        quotation_ids=request.ids,
+        approver_id=current_user.id,
+        notes=request.notes,
+    )
+
 @router.get("/{quotation_id}", response_model=schemas.Quotation)
-def read_quotation(
+async def read_quotation(
     quotation_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     指定されたIDの見積書情報を取得します。
     """
-    db_quotation = crud.get_quotation(db, quotation_id=quotation_id)
+    db_quotation = await async_crud.get_quotation(db, quotation_id=quotation_id)
     if db_quotation is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
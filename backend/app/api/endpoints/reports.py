@@ -0,0 +1,53 @@
+from datetime import date
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from ... import models
+from ...auth import get_current_active_user
+from ...reports import ReportFormat, SalesGroup, SalesPeriod, sales_report_query, stream_report
+
+router = APIRouter()
+
+REPORT_MEDIA_TYPES = {"json": "application/json", "csv": "text/csv; charset=utf-8"}
+
+@router.get("/sales")
+def read_sales_report(
+    group_by: List[SalesGroup] = Query(["period"]),
+    period: SalesPeriod = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    customer_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    format: ReportFormat = "json",
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    発行済み請求書の売上を期間・顧客・商品別に集計します。
+    group_by には period / customer / product を複数指定できます
+    （例: ?group_by=period&group_by=customer）。
+    period は集計単位（day / week / month / quarter / year）、
+    date_from と date_to は請求日で両端を含みます。
+    集計はデータベースで行い、結果は JSON 配列または CSV（format=csv）として逐次返します。
+    月単位で区切られた期間の集計は、月次売上集計テーブルから行います。
+    """
+    if date_from is not None and date_to is not None and date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="date_from must not be after date_to",
+        )
+    query = sales_report_query(
+        list(dict.fromkeys(group_by)),
+        period=period,
+        date_from=date_from,
+        date_to=date_to,
+        customer_id=customer_id,
+        product_id=product_id,
+    )
+    headers = {}
+    if format == "csv":
+        headers["Content-Disposition"] = 'attachment; filename="sales_report.csv"'
+    return StreamingResponse(
+        stream_report(query, format), media_type=REPORT_MEDIA_TYPES[format], headers=headers
+    )
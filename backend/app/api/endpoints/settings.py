@@ -10,7 +10,6 @@ router = APIRouter()
 # システム設定
 @router.get("/system", response_model=schemas.SystemSetting)
 def read_system_setting(
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
@@ -22,7 +21,7 @@ def read_system_setting(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not enough permissions",
         )
-    db_setting = crud.get_system_setting(db)
+    db_setting = crud.get_cached_system_setting()
     if db_setting is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -83,14 +82,12 @@ def read_tax_rates(
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     税率一覧を取得します。
     """
     return crud.get_tax_rates(
-        db,
         skip=skip,
         limit=limit,
         sort_by=sort_by,
@@ -145,14 +142,12 @@ def read_payment_terms(
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     支払い条件一覧を取得します。
     """
     return crud.get_payment_terms(
-        db,
         skip=skip,
         limit=limit,
         sort_by=sort_by,
@@ -207,14 +202,12 @@ def read_email_templates(
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     メールテンプレート一覧を取得します。
     """
     return crud.get_email_templates(
-        db,
         skip=skip,
         limit=limit,
         sort_by=sort_by,
@@ -42,11 +42,15 @@ def create_user(
     return crud.create_user(db=db, user=user)
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(current_user: models.User = Depends(get_current_active_user)):
+def read_user_me(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
     """
     現在のユーザー情報を取得します。
     """
-    return current_user
+    # 権限埋め込みトークンの場合 current_user はトークンの内容のみを持つため、DB から読み直す
+    return crud.get_user(db, user_id=current_user.id)
 
 @router.get("/{user_id}", response_model=schemas.User)
 def read_user(
@@ -66,6 +70,17 @@ def read_user(
         )
     return db_user
 
+@router.put("/me", response_model=schemas.User)
+def update_user_me(
+    user: schemas.UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    現在のユーザー情報を更新します。
+    """
+    return crud.update_user(db=db, user_id=current_user.id, user=user)
+
 @router.put("/{user_id}", response_model=schemas.User)
 def update_user(
     user_id: str,
@@ -84,14 +99,3 @@ def update_user(
             detail="User not found",
         )
     return crud.update_user(db=db, user_id=user_id, user=user)
-
-@router.put("/me", response_model=schemas.User)
-def update_user_me(
-    user: schemas.UserUpdate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
-):
-    """
-    現在のユーザー情報を更新します。
-    """
-    return crud.update_user(db=db, user_id=current_user.id, user=user) 
\ No newline at end of file
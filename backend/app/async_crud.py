@@ -0,0 +1,121 @@
+from typing import List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .crud import invoice_loader_options, quotation_loader_options
+from .pagination import keyset_filter, keyset_order_by
+
+# Async readers for the hot list/detail endpoints.
+# Relationships serialized by the response schemas are loaded eagerly with the same
+# loader options as crud, since lazy loading is not available on an AsyncSession.
+
+def _paginate(query, model, skip: int, limit: int, sort_by: str, sort_order: str, cursor):
+    if cursor:
+        query = query.where(keyset_filter(model, sort_by, sort_order, cursor))
+    query = query.order_by(*keyset_order_by(model, sort_by, sort_order))
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+# Customer readers
+async def get_customer(db: AsyncSession, customer_id: str) -> Optional[models.Customer]:
+    result = await db.execute(select(models.Customer).where(models.Customer.id == customer_id))
+    return result.scalars().first()
+
+async def get_customers(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[models.Customer]:
+    query = select(models.Customer)
+    if status:
+        query = query.where(models.Customer.status == status)
+    query = _paginate(query, models.Customer, skip, limit, sort_by, sort_order, cursor)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+# Product readers
+async def get_product(db: AsyncSession, product_id: str) -> Optional[models.Product]:
+    result = await db.execute(select(models.Product).where(models.Product.id == product_id))
+    return result.scalars().first()
+
+async def get_products(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[models.Product]:
+    query = select(models.Product)
+    if category:
+        query = query.where(models.Product.category == category)
+    if status:
+        query = query.where(models.Product.status == status)
+    query = _paginate(query, models.Product, skip, limit, sort_by, sort_order, cursor)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+# Quotation readers
+async def get_quotation(db: AsyncSession, quotation_id: str) -> Optional[models.Quotation]:
+    result = await db.execute(
+        select(models.Quotation)
+        .options(*quotation_loader_options())
+        .where(models.Quotation.id == quotation_id)
+    )
+    return result.scalars().first()
+
+async def get_quotations(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    status: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[models.Quotation]:
+    query = select(models.Quotation).options(*quotation_loader_options())
+    if status:
+        query = query.where(models.Quotation.status == status)
+    if customer_id:
+        query = query.where(models.Quotation.customer_id == customer_id)
+    query = _paginate(query, models.Quotation, skip, limit, sort_by, sort_order, cursor)
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+# Invoice readers
+async def get_invoice(db: AsyncSession, invoice_id: str) -> Optional[models.Invoice]:
+    result = await db.execute(
+        select(models.Invoice)
+        .options(*invoice_loader_options())
+        .where(models.Invoice.id == invoice_id)
+    )
+    return result.scalars().first()
+
+async def get_invoices(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    sort_by: str = "created_at",
+    sort_order: str = "desc",
+    status: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+) -> List[models.Invoice]:
+    query = select(models.Invoice).options(*invoice_loader_options())
+    if status:
+        query = query.where(models.Invoice.status == status)
+    if customer_id:
+        query = query.where(models.Invoice.customer_id == customer_id)
+    query = _paginate(query, models.Invoice, skip, limit, sort_by, sort_order, cursor)
+    result = await db.execute(query)
+    return list(result.scalars().all())
@@ -1,14 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+import asyncio
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 
-from .database import get_db
+from .cache import TTLCache
+from .database import get_async_db
+from .hashing import verify_password
 from .models import User
 
 load_dotenv()
@@ -17,15 +21,131 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAXSIZE = int(os.getenv("PRINCIPAL_CACHE_MAXSIZE", "1024"))
+# 検証済みトークン → クレームのキャッシュ（有効期限 exp を超えては保持しない）
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "300"))
+TOKEN_CACHE_MAXSIZE = int(os.getenv("TOKEN_CACHE_MAXSIZE", "4096"))
+# true の場合、権限フラグをトークンに埋め込み、リクエストごとのユーザー取得を省略する
+TOKEN_PERMISSION_CLAIMS = os.getenv("TOKEN_PERMISSION_CLAIMS", "false").lower() in (
+    "1", "true", "yes"
+)
+# トークンバージョン表の更新間隔。無効化・権限変更が他ワーカーに反映されるまでの最大遅延
+TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv("TOKEN_VERSION_REFRESH_SECONDS", "10"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+# 認証済みユーザーのキャッシュ（ユーザーID → カラム値）
+# 同一プロセス内の更新は invalidate_principal で即時反映し、
+# 他ワーカーでの更新は TTL 経過後に反映される
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_MAXSIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+_USER_COLUMNS = tuple(column.key for column in User.__table__.columns)
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+# 同じトークンはセッション中に何度も送られるため、署名検証済みのクレームを再利用する
+token_cache = TTLCache(maxsize=TOKEN_CACHE_MAXSIZE, ttl=TOKEN_CACHE_TTL_SECONDS)
+
+PERMISSION_FIELDS = (
+    "create_quote_permission",
+    "approve_quote_permission",
+    "manage_order_permission",
+    "create_invoice_permission",
+    "approve_invoice_permission",
+    "manage_revenue_permission",
+    "admin_permission",
+)
+# 変更時に token_version を進め、発行済みトークンを失効させるカラム
+TOKEN_VERSION_FIELDS = ("email", "is_active", *PERMISSION_FIELDS)
+
+class TokenVersionTable:
+    """
+    ユーザーID → (token_version, is_active) のプロセス内テーブル。
+    refresh_seconds ごとに users から 3 カラムだけを読み直し、権限埋め込みトークンの失効判定に使う。
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[str, Tuple[int, bool]] = {}
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def get(self, user_id: str) -> Optional[Tuple[int, bool]]:
+        return self._versions.get(user_id)
+
+    def record(self, user_id: str, version: int, is_active: bool) -> None:
+        current = self._versions.get(user_id)
+        if current is None or current[0] <= version:
+            self._versions[user_id] = (version, is_active)
+
+    async def refresh_if_stale(self, db: AsyncSession) -> None:
+        if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+            return
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at < self.refresh_seconds:
+                return
+            result = await db.execute(select(User.id, User.token_version, User.is_active))
+            self._versions = {row.id: (row.token_version, row.is_active) for row in result}
+            self._refreshed_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._versions),
+            "seconds_since_refresh": time.monotonic() - self._refreshed_at,
+        }
+
+token_versions = TokenVersionTable(TOKEN_VERSION_REFRESH_SECONDS)
+
+def invalidate_principal(user_id: str) -> None:
+    principal_cache.invalidate(user_id)
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    トークンを検証してクレームを返す。検証済みのトークンは exp までキャッシュする。
+    不正なトークンは JWTError を送出する。
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        ttl = TOKEN_CACHE_TTL_SECONDS
+        if payload.get("exp") is not None:
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            token_cache.set(token, payload, ttl)
+    return payload
+
+def token_claims(user: User) -> Dict[str, Any]:
+    """
+    ログイン時にアクセストークンへ含めるクレームを返す。
+    """
+    claims: Dict[str, Any] = {"sub": user.id, "ver": user.token_version}
+    if TOKEN_PERMISSION_CLAIMS:
+        claims.update(
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            perms=[field for field in PERMISSION_FIELDS if getattr(user, field)],
+        )
+    return claims
+
+def _user_from_claims(payload: Dict[str, Any]) -> User:
+    perms = set(payload.get("perms") or ())
+    return User(
+        id=payload["sub"],
+        email=payload.get("email"),
+        first_name=payload.get("first_name"),
+        last_name=payload.get("last_name"),
+        is_active=True,
+        token_version=payload["ver"],
+        **{field: field in perms for field in PERMISSION_FIELDS},
+    )
+
+# bcrypt の照合は専用のワーカープール（hashing.password_pool）で実行し、
+# 待機中はイベントループもリクエスト用スレッドも占有しない
+async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalars().first()
+    if not user or not await verify_password(password, user.hashed_password):
+        return None
+    return user
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
@@ -37,26 +157,58 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+# 認証依存関係は全エンドポイントで実行されるため、イベントループをブロックしないよう
+# 非同期セッションでユーザーを取得する
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id: str = payload.get("sub")
         if user_id is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+    token_version = payload.get("ver")
+
+    # 権限埋め込みトークンはバージョン表で失効を確認し、ユーザーを読み込まずに認可する。
+    # 表にないユーザー（直近に作成されたユーザーなど）は通常の経路で確認する
+    if TOKEN_PERMISSION_CLAIMS and "perms" in payload and token_version is not None:
+        await token_versions.refresh_if_stale(db)
+        state = token_versions.get(user_id)
+        if state is not None:
+            version, is_active = state
+            if version != token_version or not is_active:
+                raise credentials_exception
+            return _user_from_claims(payload)
+
+    values = principal_cache.get(user_id)
+    if values is None:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        values = {key: getattr(user, key) for key in _USER_COLUMNS}
+        principal_cache.set(user_id, values)
+    if token_version is not None and token_version != values["token_version"]:
         raise credentials_exception
-    return user
+    # セッションに属さない User をリクエストごとに生成し、キャッシュ内容の変更を防ぐ
+    return User(**values)
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    if not current_user.admin_permission:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    return current_user
@@ -0,0 +1,67 @@
+import os
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .cache import TTLCache
+
+# Total-count strategies for paginated list responses.
+#   cached:    exact COUNT(*) reused per (table, filters) until the TTL expires
+#   exact:     COUNT(*) on every request
+#   estimated: planner statistics (pg_class.reltuples) for unfiltered lists,
+#              falls back to cached when filters are present
+#   none:      no count; total_items / total_pages are omitted
+CountStrategy = Literal["cached", "exact", "estimated", "none"]
+
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+COUNT_CACHE_MAXSIZE = int(os.getenv("COUNT_CACHE_MAXSIZE", "4096"))
+# これより小さいテーブルでは推定値ではなく正確な件数を返す
+COUNT_ESTIMATE_MIN_ROWS = int(os.getenv("COUNT_ESTIMATE_MIN_ROWS", "10000"))
+
+count_cache = TTLCache(maxsize=COUNT_CACHE_MAXSIZE, ttl=COUNT_CACHE_TTL_SECONDS)
+
+async def _exact_count(db: AsyncSession, model, filters: Dict[str, Any]) -> int:
+    query = select(func.count()).select_from(model)
+    for field, value in filters.items():
+        query = query.where(getattr(model, field) == value)
+    result = await db.execute(query)
+    return result.scalar_one()
+
+async def _estimated_count(db: AsyncSession, model) -> Optional[int]:
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": model.__tablename__},
+    )
+    estimate = result.scalar()
+    # reltuples は未 ANALYZE のテーブルでは -1 になる
+    if estimate is None or estimate < COUNT_ESTIMATE_MIN_ROWS:
+        return None
+    return int(estimate)
+
+async def count_rows(
+    db: AsyncSession,
+    model,
+    filters: Dict[str, Any],
+    strategy: CountStrategy = "cached",
+) -> Tuple[Optional[int], bool]:
+    """
+    filters（カラム名 → 値の等価条件）に一致する件数を返す。
+    戻り値は (件数, 推定値かどうか)。strategy が none の場合は (None, False)。
+    """
+    filters = {field: value for field, value in filters.items() if value is not None}
+    if strategy == "none":
+        return None, False
+    if strategy == "estimated" and not filters:
+        estimate = await _estimated_count(db, model)
+        if estimate is not None:
+            return estimate, True
+    if strategy == "exact":
+        return await _exact_count(db, model, filters), False
+
+    key = (model.__tablename__, tuple(sorted(filters.items())))
+    total = count_cache.get(key)
+    if total is None:
+        total = await _exact_count(db, model, filters)
+        count_cache.set(key, total)
+    return total, False
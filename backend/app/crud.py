@@ -1,10 +1,26 @@
-from typing import List, Optional, Dict, Any, Union
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
-from . import models, schemas
+from typing import List, Optional, Dict, Any, Callable, Iterable, Tuple, Union
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import desc, asc, case, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from . import models, numbering, sales_summary, schemas
+from .pagination import keyset_filter, keyset_order_by
+from .reference_data import notify_changed, reference_data, sorted_page
+from .sales_tax import sales_tax_rates
+from .tax_rates import tax_rate_index
+from .auth import TOKEN_VERSION_FIELDS, invalidate_principal, token_versions
+from .hashing import get_password_hash
 from datetime import datetime
+import os
 import uuid
 
+# Documents with at least this many lines insert their items with a bulk core insert
+LINE_ITEM_BULK_THRESHOLD = int(os.getenv("LINE_ITEM_BULK_THRESHOLD", "50"))
+# Invoices per transaction in the batch creation endpoint
+INVOICE_BATCH_CHUNK_SIZE = int(os.getenv("INVOICE_BATCH_CHUNK_SIZE", "500"))
+INVOICE_BATCH_MAX_SIZE = int(os.getenv("INVOICE_BATCH_MAX_SIZE", "10000"))
+# Documents per request in the bulk workflow transition endpoints
+BULK_TRANSITION_MAX_SIZE = int(os.getenv("BULK_TRANSITION_MAX_SIZE", "1000"))
+
 # User CRUD operations
 def get_user(db: Session, user_id: str) -> Optional[models.User]:
     return db.query(models.User).filter(models.User.id == user_id).first()
@@ -59,11 +75,20 @@ def update_user(
         return None
 
     update_data = user.dict(exclude_unset=True)
+    revoke = any(
+        field in TOKEN_VERSION_FIELDS and getattr(db_user, field) != value
+        for field, value in update_data.items()
+    )
     for field, value in update_data.items():
         setattr(db_user, field, value)
+    if revoke:
+        # Tokens issued before the change stop validating once their version is stale
+        db_user.token_version = models.User.token_version + 1
 
     db.commit()
+    invalidate_principal(user_id)
     db.refresh(db_user)
+    token_versions.record(user_id, db_user.token_version, db_user.is_active)
     return db_user
 
 # Customer CRUD operations
@@ -77,15 +102,17 @@ def get_customers(
     sort_by: str = "created_at",
     sort_order: str = "desc",
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[models.Customer]:
     query = db.query(models.Customer)
     if status:
         query = query.filter(models.Customer.status == status)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.Customer, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.Customer, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(keyset_filter(models.Customer, sort_by, sort_order, cursor))
+    query = query.order_by(*keyset_order_by(models.Customer, sort_by, sort_order))
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_customer(
     db: Session, customer: schemas.CustomerCreate, user_id: str
@@ -131,17 +158,26 @@ def get_products(
     sort_order: str = "desc",
     category: Optional[str] = None,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[models.Product]:
     query = db.query(models.Product)
     if category:
         query = query.filter(models.Product.category == category)
     if status:
         query = query.filter(models.Product.status == status)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.Product, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.Product, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(keyset_filter(models.Product, sort_by, sort_order, cursor))
+    query = query.order_by(*keyset_order_by(models.Product, sort_by, sort_order))
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+def get_products_by_ids(db: Session, product_ids: Iterable[str]) -> Dict[str, models.Product]:
+    ids = set(product_ids)
+    if not ids:
+        return {}
+    products = db.query(models.Product).filter(models.Product.id.in_(ids)).all()
+    return {product.id: product for product in products}
 
 def create_product(
     db: Session, product: schemas.ProductCreate, user_id: str
@@ -173,8 +209,20 @@ def update_product(
     return db_product
 
 # Quotation CRUD operations
+def quotation_loader_options():
+    # Relationships serialized by schemas.Quotation; loaded up front to avoid N+1 lazy loads
+    return (
+        selectinload(models.Quotation.items),
+        joinedload(models.Quotation.customer),
+    )
+
 def get_quotation(db: Session, quotation_id: str) -> Optional[models.Quotation]:
-    return db.query(models.Quotation).filter(models.Quotation.id == quotation_id).first()
+    return (
+        db.query(models.Quotation)
+        .options(*quotation_loader_options())
+        .filter(models.Quotation.id == quotation_id)
+        .first()
+    )
 
 def get_quotations(
     db: Session,
@@ -184,31 +232,31 @@ def get_quotations(
     sort_order: str = "desc",
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[models.Quotation]:
-    query = db.query(models.Quotation)
+    query = db.query(models.Quotation).options(*quotation_loader_options())
     if status:
         query = query.filter(models.Quotation.status == status)
     if customer_id:
         query = query.filter(models.Quotation.customer_id == customer_id)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.Quotation, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.Quotation, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(keyset_filter(models.Quotation, sort_by, sort_order, cursor))
+    query = query.order_by(*keyset_order_by(models.Quotation, sort_by, sort_order))
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_quotation(
     db: Session, quotation: schemas.QuotationCreate, user_id: str
 ) -> models.Quotation:
-    # Generate quotation number
-    quotation_number = generate_quotation_number(db)
+    # Allocate quotation number
+    quotation_number = numbering.next_number(db, "quotation", quotation.quotation_date)
+
+    # Resolve all referenced products in one query, then their tax rates on the document date
+    rates = resolve_tax_rates(resolve_products(db, quotation.items), quotation.quotation_date)
 
     # Calculate totals
-    subtotal = sum(item.quantity * item.unit_price for item in quotation.items)
-    tax_amount = sum(
-        item.quantity * item.unit_price * get_product(db, item.product_id).tax_rate
-        for item in quotation.items
-    )
-    total_amount = subtotal + tax_amount
+    subtotal, tax_amount, total_amount = calculate_totals(quotation.items, rates)
 
     # Create quotation
     db_quotation = models.Quotation(
@@ -225,22 +273,9 @@ def create_quotation(
     db.flush()
 
     # Create quotation items
-    for item in quotation.items:
-        product = get_product(db, item.product_id)
-        db_item = models.QuotationItem(
-            id=str(uuid.uuid4()),
-            quotation_id=db_quotation.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            subtotal=item.quantity * item.unit_price,
-            tax_rate=product.tax_rate,
-            tax_amount=item.quantity * item.unit_price * product.tax_rate,
-            total_amount=item.quantity * item.unit_price * (1 + product.tax_rate),
-            description=item.description,
-            sort_order=item.sort_order,
-        )
-        db.add(db_item)
+    add_line_items(
+        db, models.QuotationItem, "quotation_id", db_quotation.id, quotation.items, rates
+    )
 
     db.commit()
     db.refresh(db_quotation)
@@ -253,48 +288,45 @@ def update_quotation(
     if not db_quotation:
         return None
 
+    rated_on = db_quotation.quotation_date
+
     # Update quotation fields
-    update_data = quotation.dict(exclude={"items"}, exclude_unset=True)
+    update_data = quotation.dict(exclude={"items", "items_mode"}, exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_quotation, field, value)
     db_quotation.updated_by = user_id
 
     # Update items if provided
-    if quotation.items is not None:
+    if quotation.items is not None and quotation.items_mode == "diff":
+        # Apply only the inserts, updates and deletes needed, adjusting totals by the delta
+        delta = diff_line_items(
+            db, models.QuotationItem, "quotation_id", db_quotation.id,
+            db_quotation.items, quotation.items, db_quotation.quotation_date,
+            rerate=db_quotation.quotation_date != rated_on,
+        )
+        db_quotation.subtotal += delta[0]
+        db_quotation.tax_amount += delta[1]
+        db_quotation.total_amount += delta[2]
+    elif quotation.items is not None:
+        products = resolve_products(db, quotation.items)
+        rates = resolve_tax_rates(products, db_quotation.quotation_date)
+
         # Delete existing items
         db.query(models.QuotationItem).filter(
             models.QuotationItem.quotation_id == quotation_id
         ).delete()
 
         # Create new items
-        for item in quotation.items:
-            product = get_product(db, item.product_id)
-            db_item = models.QuotationItem(
-                id=str(uuid.uuid4()),
-                quotation_id=db_quotation.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                subtotal=item.quantity * item.unit_price,
-                tax_rate=product.tax_rate,
-                tax_amount=item.quantity * item.unit_price * product.tax_rate,
-                total_amount=item.quantity * item.unit_price * (1 + product.tax_rate),
-                description=item.description,
-                sort_order=item.sort_order,
-            )
-            db.add(db_item)
-
-        # Recalculate totals
-        subtotal = sum(item.quantity * item.unit_price for item in quotation.items)
-        tax_amount = sum(
-            item.quantity * item.unit_price * get_product(db, item.product_id).tax_rate
-            for item in quotation.items
+        add_line_items(
+            db, models.QuotationItem, "quotation_id", db_quotation.id, quotation.items, rates
         )
-        total_amount = subtotal + tax_amount
 
-        db_quotation.subtotal = subtotal
-        db_quotation.tax_amount = tax_amount
-        db_quotation.total_amount = total_amount
+        # Recalculate totals
+        (
+            db_quotation.subtotal,
+            db_quotation.tax_amount,
+            db_quotation.total_amount,
+        ) = calculate_totals(quotation.items, rates)
 
     db.commit()
     db.refresh(db_quotation)
@@ -333,9 +365,38 @@ def approve_quotation(
     db.refresh(db_quotation)
     return db_quotation
 
+def bulk_request_quotation_approval(
+    db: Session, quotation_ids: List[str], approver_id: str, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    return transition_status(
+        db, models.Quotation, quotation_ids, "draft", "pending_approval", notes,
+        approver_id=approver_id,
+    )
+
+def bulk_approve_quotations(
+    db: Session, quotation_ids: List[str], approver_id: str, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    return transition_status(
+        db, models.Quotation, quotation_ids, "pending_approval", "approved", notes,
+        approver_id=approver_id, approved_at=datetime.utcnow(),
+    )
+
 # Invoice CRUD operations
+def invoice_loader_options():
+    # Relationships serialized by schemas.Invoice; loaded up front to avoid N+1 lazy loads
+    return (
+        selectinload(models.Invoice.items),
+        selectinload(models.Invoice.payments),
+        joinedload(models.Invoice.customer),
+    )
+
 def get_invoice(db: Session, invoice_id: str) -> Optional[models.Invoice]:
-    return db.query(models.Invoice).filter(models.Invoice.id == invoice_id).first()
+    return (
+        db.query(models.Invoice)
+        .options(*invoice_loader_options())
+        .filter(models.Invoice.id == invoice_id)
+        .first()
+    )
 
 def get_invoices(
     db: Session,
@@ -345,31 +406,35 @@ def get_invoices(
     sort_order: str = "desc",
     status: Optional[str] = None,
     customer_id: Optional[str] = None,
+    cursor: Optional[str] = None,
 ) -> List[models.Invoice]:
-    query = db.query(models.Invoice)
+    query = db.query(models.Invoice).options(*invoice_loader_options())
     if status:
         query = query.filter(models.Invoice.status == status)
     if customer_id:
         query = query.filter(models.Invoice.customer_id == customer_id)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.Invoice, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.Invoice, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        query = query.filter(keyset_filter(models.Invoice, sort_by, sort_order, cursor))
+    query = query.order_by(*keyset_order_by(models.Invoice, sort_by, sort_order))
+    if not cursor:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_invoice(
     db: Session, invoice: schemas.InvoiceCreate, user_id: str
 ) -> models.Invoice:
-    # Generate invoice number
-    invoice_number = generate_invoice_number(db)
+    # Allocate invoice number
+    invoice_number = numbering.next_number(db, "invoice", invoice.invoice_date)
+
+    # Resolve all referenced products in one query, then their tax rates on the document date
+    rates = resolve_tax_rates(
+        resolve_products(db, invoice.items),
+        invoice.invoice_date,
+        customer_sales_tax_rate(db, invoice.customer_id),
+    )
 
     # Calculate totals
-    subtotal = sum(item.quantity * item.unit_price for item in invoice.items)
-    tax_amount = sum(
-        item.quantity * item.unit_price * get_product(db, item.product_id).tax_rate
-        for item in invoice.items
-    )
-    total_amount = subtotal + tax_amount
+    subtotal, tax_amount, total_amount = calculate_totals(invoice.items, rates)
 
     # Create invoice
     db_invoice = models.Invoice(
@@ -379,6 +444,8 @@ def create_invoice(
         subtotal=subtotal,
         tax_amount=tax_amount,
         total_amount=total_amount,
+        amount_paid=0,
+        balance_due=total_amount,
         status="draft",
         payment_status="unpaid",
         created_by=user_id,
@@ -387,27 +454,109 @@ def create_invoice(
     db.flush()
 
     # Create invoice items
-    for item in invoice.items:
-        product = get_product(db, item.product_id)
-        db_item = models.InvoiceItem(
-            id=str(uuid.uuid4()),
-            invoice_id=db_invoice.id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            subtotal=item.quantity * item.unit_price,
-            tax_rate=product.tax_rate,
-            tax_amount=item.quantity * item.unit_price * product.tax_rate,
-            total_amount=item.quantity * item.unit_price * (1 + product.tax_rate),
-            description=item.description,
-            sort_order=item.sort_order,
-        )
-        db.add(db_item)
+    add_line_items(
+        db, models.InvoiceItem, "invoice_id", db_invoice.id, invoice.items, rates
+    )
 
     db.commit()
     db.refresh(db_invoice)
     return db_invoice
 
+def create_invoices_batch(
+    db: Session,
+    invoices: List[schemas.InvoiceCreate],
+    user_id: str,
+    chunk_size: int = INVOICE_BATCH_CHUNK_SIZE,
+) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = [
+        {"index": index, "success": False} for index in range(len(invoices))
+    ]
+
+    # Validate the whole batch with one customer query and one product query
+    customer_ids = {invoice.customer_id for invoice in invoices}
+    known_customers = {
+        row.id: customer_tax_address(row.address, row.billing_address)
+        for row in db.query(
+            models.Customer.id, models.Customer.address, models.Customer.billing_address
+        ).filter(models.Customer.id.in_(customer_ids))
+    }
+    products = get_products_by_ids(
+        db, (item.product_id for invoice in invoices for item in invoice.items)
+    )
+    valid = []
+    for index, invoice in enumerate(invoices):
+        missing = {item.product_id for item in invoice.items} - products.keys()
+        if invoice.customer_id not in known_customers:
+            results[index]["error"] = f"Customer not found: {invoice.customer_id}"
+        elif missing:
+            results[index]["error"] = f"Product not found: {', '.join(sorted(missing))}"
+        elif not invoice.items:
+            results[index]["error"] = "Invoice has no items"
+        else:
+            valid.append(index)
+
+    def insert_chunk(chunk: List[int]) -> List[Dict[str, Any]]:
+        numbers = numbering.allocate_numbers_for_dates(
+            db, "invoice", [invoices[index].invoice_date for index in chunk]
+        )
+        headers, items = [], []
+        for index, invoice_number in zip(chunk, numbers):
+            invoice = invoices[index]
+            invoice_id = str(uuid.uuid4())
+            rates = resolve_tax_rates(
+                {item.product_id: products[item.product_id] for item in invoice.items},
+                invoice.invoice_date,
+                sales_tax_rates.rate_for_address(known_customers[invoice.customer_id]),
+            )
+            subtotal, tax_amount, total_amount = calculate_totals(invoice.items, rates)
+            headers.append({
+                "id": invoice_id,
+                "invoice_number": invoice_number,
+                **invoice.dict(exclude={"items"}),
+                "subtotal": subtotal,
+                "tax_amount": tax_amount,
+                "total_amount": total_amount,
+                "amount_paid": 0,
+                "balance_due": total_amount,
+                "status": "draft",
+                "payment_status": "unpaid",
+                "created_by": user_id,
+            })
+            items.extend(line_item_rows("invoice_id", invoice_id, invoice.items, rates))
+        db.execute(insert(models.Invoice), headers)
+        db.execute(insert(models.InvoiceItem), items)
+        db.commit()
+        return headers
+
+    # Insert valid invoices chunk by chunk, one transaction per chunk. A chunk that fails
+    # is retried one invoice per transaction so only the offending invoices fail
+    pending = [valid[start:start + chunk_size] for start in range(0, len(valid), chunk_size)]
+    while pending:
+        chunk = pending.pop(0)
+        try:
+            headers = insert_chunk(chunk)
+        except SQLAlchemyError as e:
+            db.rollback()
+            if len(chunk) > 1:
+                pending[:0] = [[index] for index in chunk]
+            else:
+                results[chunk[0]]["error"] = database_error_message(e)
+            continue
+        for index, header in zip(chunk, headers):
+            results[index].update(
+                success=True, id=header["id"], invoice_number=header["invoice_number"]
+            )
+    return results
+
+def database_error_message(error: SQLAlchemyError) -> str:
+    # The driver's first message line plus the violated constraint, when there is one
+    orig = getattr(error, "orig", None)
+    if orig is None:
+        return f"Database error: {error.__class__.__name__}"
+    message = f"Database error: {str(orig).strip().splitlines()[0]}"
+    constraint = getattr(getattr(orig, "diag", None), "constraint_name", None)
+    return f"{message} (constraint: {constraint})" if constraint else message
+
 def update_invoice(
     db: Session, invoice_id: str, invoice: schemas.InvoiceUpdate, user_id: str
 ) -> Optional[models.Invoice]:
@@ -415,48 +564,62 @@ def update_invoice(
     if not db_invoice:
         return None
 
+    # An issued invoice leaves the monthly sales summaries here and re-enters them below
+    if db_invoice.status == sales_summary.SUMMARY_STATUS:
+        sales_summary.remove_invoices(db, [db_invoice.id])
+
+    rated_on = (db_invoice.invoice_date, db_invoice.customer_id)
+
     # Update invoice fields
-    update_data = invoice.dict(exclude={"items"}, exclude_unset=True)
+    update_data = invoice.dict(exclude={"items", "items_mode"}, exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_invoice, field, value)
     db_invoice.updated_by = user_id
 
     # Update items if provided
-    if invoice.items is not None:
+    if invoice.items is not None and invoice.items_mode == "diff":
+        # Apply only the inserts, updates and deletes needed, adjusting totals by the delta
+        delta = diff_line_items(
+            db, models.InvoiceItem, "invoice_id", db_invoice.id,
+            db_invoice.items, invoice.items, db_invoice.invoice_date,
+            customer_sales_tax_rate(db, db_invoice.customer_id),
+            rerate=(db_invoice.invoice_date, db_invoice.customer_id) != rated_on,
+        )
+        db_invoice.subtotal += delta[0]
+        db_invoice.tax_amount += delta[1]
+        db_invoice.total_amount += delta[2]
+    elif invoice.items is not None:
+        products = resolve_products(db, invoice.items)
+        rates = resolve_tax_rates(
+            products,
+            db_invoice.invoice_date,
+            customer_sales_tax_rate(db, db_invoice.customer_id),
+        )
+
         # Delete existing items
         db.query(models.InvoiceItem).filter(
             models.InvoiceItem.invoice_id == invoice_id
         ).delete()
 
         # Create new items
-        for item in invoice.items:
-            product = get_product(db, item.product_id)
-            db_item = models.InvoiceItem(
-                id=str(uuid.uuid4()),
-                invoice_id=db_invoice.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-                subtotal=item.quantity * item.unit_price,
-                tax_rate=product.tax_rate,
-                tax_amount=item.quantity * item.unit_price * product.tax_rate,
-                total_amount=item.quantity * item.unit_price * (1 + product.tax_rate),
-                description=item.description,
-                sort_order=item.sort_order,
-            )
-            db.add(db_item)
+        add_line_items(
+            db, models.InvoiceItem, "invoice_id", db_invoice.id, invoice.items, rates
+        )
 
         # Recalculate totals
-        subtotal = sum(item.quantity * item.unit_price for item in invoice.items)
-        tax_amount = sum(
-            item.quantity * item.unit_price * get_product(db, item.product_id).tax_rate
-            for item in invoice.items
-        )
-        total_amount = subtotal + tax_amount
+        (
+            db_invoice.subtotal,
+            db_invoice.tax_amount,
+            db_invoice.total_amount,
+        ) = calculate_totals(invoice.items, rates)
+
+    if invoice.items is not None:
+        # Keep the stored balance in step with the new total; amount_paid is read by the UPDATE
+        db_invoice.balance_due = db_invoice.total_amount - models.Invoice.amount_paid
 
-        db_invoice.subtotal = subtotal
-        db_invoice.tax_amount = tax_amount
-        db_invoice.total_amount = total_amount
+    if db_invoice.status == sales_summary.SUMMARY_STATUS:
+        db.flush()
+        sales_summary.add_invoices(db, [db_invoice.id])
 
     db.commit()
     db.refresh(db_invoice)
@@ -505,17 +668,65 @@ def issue_invoice(
     db_invoice.status = "issued"
     if notes:
         db_invoice.notes = notes
+    db.flush()
+    sales_summary.add_invoices(db, [db_invoice.id])
 
     db.commit()
     db.refresh(db_invoice)
     return db_invoice
 
+def bulk_request_invoice_approval(
+    db: Session, invoice_ids: List[str], approver_id: str, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    return transition_status(
+        db, models.Invoice, invoice_ids, "draft", "pending_approval", notes,
+        approver_id=approver_id,
+    )
+
+def bulk_approve_invoices(
+    db: Session, invoice_ids: List[str], approver_id: str, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    return transition_status(
+        db, models.Invoice, invoice_ids, "pending_approval", "approved", notes,
+        approver_id=approver_id, approved_at=datetime.utcnow(),
+    )
+
+def bulk_issue_invoices(
+    db: Session, invoice_ids: List[str], user_id: str, notes: Optional[str] = None
+) -> Dict[str, Any]:
+    return transition_status(
+        db, models.Invoice, invoice_ids, "approved", "issued", notes,
+        after_update=sales_summary.add_invoices, updated_by=user_id,
+    )
+
+def get_invoice_status(db: Session, invoice_id: str) -> Optional[str]:
+    return db.query(models.Invoice.status).filter(models.Invoice.id == invoice_id).scalar()
+
 def register_payment(
     db: Session, invoice_id: str, payment: schemas.PaymentCreate, user_id: str
 ) -> Optional[models.Payment]:
-    db_invoice = get_invoice(db, invoice_id)
-    if not db_invoice:
+    # Add the payment to the stored running total in a single UPDATE; the row lock it takes
+    # serializes concurrent payments, and SET expressions see the pre-update values.
+    # Returns None when the invoice does not exist or is not issued
+    amount = payment.payment_amount
+    paid = models.Invoice.amount_paid + amount
+    updated = db.execute(
+        update(models.Invoice)
+        .where(models.Invoice.id == invoice_id, models.Invoice.status == "issued")
+        .values(
+            amount_paid=paid,
+            balance_due=models.Invoice.total_amount - paid,
+            payment_status=case(
+                (paid >= models.Invoice.total_amount, "paid"), else_="partially_paid"
+            ),
+        )
+        .returning(models.Invoice.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if updated is None:
+        db.rollback()
         return None
+    sales_summary.add_payment(db, invoice_id, amount)
 
     # Create payment
     db_payment = models.Payment(
@@ -526,14 +737,6 @@ def register_payment(
         created_by=user_id,
     )
     db.add(db_payment)
-
-    # Update invoice payment status
-    total_paid = sum(p.payment_amount for p in db_invoice.payments) + payment.payment_amount
-    if total_paid >= db_invoice.total_amount:
-        db_invoice.payment_status = "paid"
-    else:
-        db_invoice.payment_status = "partially_paid"
-
     db.commit()
     db.refresh(db_payment)
     return db_payment
@@ -543,18 +746,13 @@ def get_tax_rate(db: Session, tax_rate_id: str) -> Optional[models.TaxRate]:
     return db.query(models.TaxRate).filter(models.TaxRate.id == tax_rate_id).first()
 
 def get_tax_rates(
-    db: Session,
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
 ) -> List[models.TaxRate]:
-    query = db.query(models.TaxRate)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.TaxRate, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.TaxRate, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    # Served from the process-local reference data cache
+    return sorted_page(reference_data.rows("tax_rates"), skip, limit, sort_by, sort_order)
 
 def create_tax_rate(
     db: Session, tax_rate: schemas.TaxRateCreate, user_id: str
@@ -565,8 +763,10 @@ def create_tax_rate(
         created_by=user_id,
     )
     db.add(db_tax_rate)
+    notify_changed(db, "tax_rates")
     db.commit()
     db.refresh(db_tax_rate)
+    tax_rate_index.upsert(db_tax_rate)
     return db_tax_rate
 
 def update_tax_rate(
@@ -580,8 +780,10 @@ def update_tax_rate(
     for field, value in update_data.items():
         setattr(db_tax_rate, field, value)
 
+    notify_changed(db, "tax_rates")
     db.commit()
     db.refresh(db_tax_rate)
+    tax_rate_index.upsert(db_tax_rate)
     return db_tax_rate
 
 # Payment Term CRUD operations
@@ -589,18 +791,13 @@ def get_payment_term(db: Session, payment_term_id: str) -> Optional[models.Payme
     return db.query(models.PaymentTerm).filter(models.PaymentTerm.id == payment_term_id).first()
 
 def get_payment_terms(
-    db: Session,
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
 ) -> List[models.PaymentTerm]:
-    query = db.query(models.PaymentTerm)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.PaymentTerm, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.PaymentTerm, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    # Served from the process-local reference data cache
+    return sorted_page(reference_data.rows("payment_terms"), skip, limit, sort_by, sort_order)
 
 def create_payment_term(
     db: Session, payment_term: schemas.PaymentTermCreate, user_id: str
@@ -611,7 +808,9 @@ def create_payment_term(
         created_by=user_id,
     )
     db.add(db_payment_term)
+    notify_changed(db, "payment_terms")
     db.commit()
+    reference_data.invalidate("payment_terms")
     db.refresh(db_payment_term)
     return db_payment_term
 
@@ -626,7 +825,9 @@ def update_payment_term(
     for field, value in update_data.items():
         setattr(db_payment_term, field, value)
 
+    notify_changed(db, "payment_terms")
     db.commit()
+    reference_data.invalidate("payment_terms")
     db.refresh(db_payment_term)
     return db_payment_term
 
@@ -635,18 +836,13 @@ def get_email_template(db: Session, template_id: str) -> Optional[models.EmailTe
     return db.query(models.EmailTemplate).filter(models.EmailTemplate.id == template_id).first()
 
 def get_email_templates(
-    db: Session,
     skip: int = 0,
     limit: int = 100,
     sort_by: str = "created_at",
     sort_order: str = "desc",
 ) -> List[models.EmailTemplate]:
-    query = db.query(models.EmailTemplate)
-    if sort_order == "desc":
-        query = query.order_by(desc(getattr(models.EmailTemplate, sort_by)))
-    else:
-        query = query.order_by(asc(getattr(models.EmailTemplate, sort_by)))
-    return query.offset(skip).limit(limit).all()
+    # Served from the process-local reference data cache
+    return sorted_page(reference_data.rows("email_templates"), skip, limit, sort_by, sort_order)
 
 def create_email_template(
     db: Session, template: schemas.EmailTemplateCreate, user_id: str
@@ -657,7 +853,9 @@ def create_email_template(
         created_by=user_id,
     )
     db.add(db_template)
+    notify_changed(db, "email_templates")
     db.commit()
+    reference_data.invalidate("email_templates")
     db.refresh(db_template)
     return db_template
 
@@ -672,7 +870,9 @@ def update_email_template(
     for field, value in update_data.items():
         setattr(db_template, field, value)
 
+    notify_changed(db, "email_templates")
     db.commit()
+    reference_data.invalidate("email_templates")
     db.refresh(db_template)
     return db_template
 
@@ -680,6 +880,11 @@ def update_email_template(
 def get_system_setting(db: Session) -> Optional[models.SystemSetting]:
     return db.query(models.SystemSetting).first()
 
+def get_cached_system_setting() -> Optional[models.SystemSetting]:
+    # Read-only copy from the reference data cache; writers use get_system_setting
+    rows = reference_data.rows("system_settings")
+    return rows[0] if rows else None
+
 def create_system_setting(
     db: Session, setting: schemas.SystemSettingCreate, user_id: str
 ) -> models.SystemSetting:
@@ -689,7 +894,9 @@ def create_system_setting(
         updated_by=user_id,
     )
     db.add(db_setting)
+    notify_changed(db, "system_settings")
     db.commit()
+    reference_data.invalidate("system_settings")
     db.refresh(db_setting)
     return db_setting
 
@@ -705,47 +912,200 @@ def update_system_setting(
         setattr(db_setting, field, value)
     db_setting.updated_by = user_id
 
+    notify_changed(db, "system_settings")
     db.commit()
+    reference_data.invalidate("system_settings")
     db.refresh(db_setting)
     return db_setting
 
 # Helper functions
-def generate_quotation_number(db: Session) -> str:
-    # Get the latest quotation number
-    latest_quotation = (
-        db.query(models.Quotation)
-        .order_by(desc(models.Quotation.created_at))
-        .first()
-    )
+class ProductNotFound(ValueError):
+    pass
+
+def resolve_products(db: Session, items) -> Dict[str, models.Product]:
+    # Load every product referenced by the line items with a single IN query
+    products = get_products_by_ids(db, (item.product_id for item in items))
+    missing = {item.product_id for item in items} - products.keys()
+    if missing:
+        raise ProductNotFound(f"Product not found: {', '.join(sorted(missing))}")
+    return products
+
+def resolve_tax_rates(
+    products: Dict[str, models.Product],
+    document_date: Optional[datetime],
+    sales_tax_rate: Optional[float] = None,
+) -> Dict[str, float]:
+    # Tax rate per product effective on the document date, resolved once per document.
+    # A jurisdiction sales tax rate replaces the rate of every taxable product;
+    # products whose own rate is zero stay exempt
+    rates = {
+        product_id: tax_rate_index.rate_for(product, document_date)
+        for product_id, product in products.items()
+    }
+    if sales_tax_rate is not None:
+        rates = {pid: sales_tax_rate if rate else rate for pid, rate in rates.items()}
+    return rates
+
+def customer_tax_address(address, billing_address) -> Optional[Dict[str, Any]]:
+    # Tax follows the billing address when there is one
+    return billing_address or address
+
+def customer_sales_tax_rate(db: Session, customer_id: str) -> Optional[float]:
+    # Jurisdiction rate for a US customer, or None when no rate table is loaded
+    if not sales_tax_rates.enabled:
+        return None
+    row = db.query(models.Customer.address, models.Customer.billing_address).filter(
+        models.Customer.id == customer_id
+    ).first()
+    if row is None:
+        return None
+    return sales_tax_rates.rate_for_address(customer_tax_address(*row))
+
+def calculate_totals(items, rates: Dict[str, float]) -> Tuple[float, float, float]:
+    subtotal = sum(item.quantity * item.unit_price for item in items)
+    tax_amount = sum(item.quantity * item.unit_price * rates[item.product_id] for item in items)
+    return subtotal, tax_amount, subtotal + tax_amount
+
+def line_amounts(item, tax_rate: float) -> Dict[str, Any]:
+    return {
+        "product_id": item.product_id,
+        "quantity": item.quantity,
+        "unit_price": item.unit_price,
+        "subtotal": item.quantity * item.unit_price,
+        "tax_rate": tax_rate,
+        "tax_amount": item.quantity * item.unit_price * tax_rate,
+        "total_amount": item.quantity * item.unit_price * (1 + tax_rate),
+        "description": item.description,
+        "sort_order": item.sort_order,
+    }
+
+def line_item_rows(parent_field: str, parent_id: str, items, rates) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            parent_field: parent_id,
+            **line_amounts(item, rates[item.product_id]),
+        }
+        for item in items
+    ]
+
+def add_line_items(db: Session, model, parent_field: str, parent_id: str, items, rates) -> None:
+    rows = line_item_rows(parent_field, parent_id, items, rates)
+    if len(rows) >= LINE_ITEM_BULK_THRESHOLD:
+        # Large documents skip the ORM unit of work and go through a core executemany insert
+        db.execute(insert(model), rows)
+    else:
+        db.add_all(model(**row) for row in rows)
 
-    if not latest_quotation:
-        # If no quotations exist, start with Q-0001
-        return "Q-0001"
-
-    # Extract the number from the latest quotation number
-    try:
-        number = int(latest_quotation.quotation_number.split("-")[1])
-        return f"Q-{number + 1:04d}"
-    except (IndexError, ValueError):
-        # If the format is invalid, start with Q-0001
-        return "Q-0001"
-
-def generate_invoice_number(db: Session) -> str:
-    # Get the latest invoice number
-    latest_invoice = (
-        db.query(models.Invoice)
-        .order_by(desc(models.Invoice.created_at))
-        .first()
+LINE_ITEM_INPUT_FIELDS = ("product_id", "quantity", "unit_price", "description", "sort_order")
+
+def diff_line_items(
+    db: Session,
+    model,
+    parent_field: str,
+    parent_id: str,
+    existing,
+    incoming,
+    document_date: Optional[datetime] = None,
+    sales_tax_rate: Optional[float] = None,
+    rerate: bool = False,
+) -> Tuple[float, float, float]:
+    # Match incoming lines to existing ones by item id, then by sort_order.
+    # With rerate (the document date or customer changed) every matched line is
+    # recalculated, as replace mode would, not only the lines whose inputs changed
+    by_id = {item.id: item for item in existing}
+    by_sort_order: Dict[int, List[Any]] = {}
+    for item in existing:
+        by_sort_order.setdefault(item.sort_order, []).append(item)
+
+    matched = set()
+    changed, added = [], []
+    for line in incoming:
+        current = None
+        if line.id:
+            candidate = by_id.get(line.id)
+            if candidate is not None and candidate.id not in matched:
+                current = candidate
+        else:
+            current = next(
+                (c for c in by_sort_order.get(line.sort_order, []) if c.id not in matched), None
+            )
+        if current is None:
+            added.append(line)
+            continue
+        matched.add(current.id)
+        if rerate or any(
+            getattr(current, f) != getattr(line, f) for f in LINE_ITEM_INPUT_FIELDS
+        ):
+            changed.append((current, line))
+    removed = [item for item in existing if item.id not in matched]
+
+    rates = resolve_tax_rates(
+        resolve_products(db, [line for _, line in changed] + added),
+        document_date,
+        sales_tax_rate,
     )
+    before = [current for current, _ in changed] + removed
+    delta = [
+        -sum(item.subtotal for item in before),
+        -sum(item.tax_amount for item in before),
+        -sum(item.total_amount for item in before),
+    ]
+
+    for current, line in changed:
+        for field, value in line_amounts(line, rates[line.product_id]).items():
+            setattr(current, field, value)
+    for item in removed:
+        db.delete(item)
+    add_line_items(db, model, parent_field, parent_id, added, rates)
+
+    after = [line_amounts(line, rates[line.product_id]) for _, line in changed]
+    after += [line_amounts(line, rates[line.product_id]) for line in added]
+    delta[0] += sum(row["subtotal"] for row in after)
+    delta[1] += sum(row["tax_amount"] for row in after)
+    delta[2] += sum(row["total_amount"] for row in after)
+    return delta[0], delta[1], delta[2]
+
+def transition_status(
+    db: Session,
+    model,
+    ids: List[str],
+    from_status: str,
+    to_status: str,
+    notes: Optional[str] = None,
+    after_update: Optional[Callable[[Session, List[str]], None]] = None,
+    **values: Any,
+) -> Dict[str, Any]:
+    # Move every document still in from_status with one UPDATE ... WHERE status = ...;
+    # the status predicate is re-checked under the row lock, so concurrent transitions
+    # of the same document cannot both succeed
+    ids = list(dict.fromkeys(ids))
+    if notes:
+        values["notes"] = notes
+    transitioned = set(db.execute(
+        update(model)
+        .where(model.id.in_(ids), model.status == from_status)
+        .values(status=to_status, **values)
+        .returning(model.id)
+        .execution_options(synchronize_session=False)
+    ).scalars())
+    # Lets the caller apply dependent changes in the same transaction
+    if after_update is not None and transitioned:
+        after_update(db, list(transitioned))
+    db.commit()
 
-    if not latest_invoice:
-        # If no invoices exist, start with INV-0001
-        return "INV-0001"
-
-    # Extract the number from the latest invoice number
-    try:
-        number = int(latest_invoice.invoice_number.split("-")[1])
-        return f"INV-{number + 1:04d}"
-    except (IndexError, ValueError):
-        # If the format is invalid, start with INV-0001
-        return "INV-0001" 
\ No newline at end of file
+    skipped = [doc_id for doc_id in ids if doc_id not in transitioned]
+    current = {}
+    if skipped:
+        current = dict(db.query(model.id, model.status).filter(model.id.in_(skipped)).all())
+    return {
+        "transitioned": [doc_id for doc_id in ids if doc_id in transitioned],
+        "skipped": [
+            {
+                "id": doc_id,
+                "status": current.get(doc_id),
+                "reason": "invalid_status" if doc_id in current else "not_found",
+            }
+            for doc_id in skipped
+        ],
+    }
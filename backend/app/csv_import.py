@@ -0,0 +1,175 @@
+"""
+顧客・商品の CSV 一括取り込み。
+
+    cd backend && python -m app.csv_import products products.csv --user-email admin@example.com
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import crud, models, schemas
+from .database import SessionLocal
+
+# Rows are validated against the Create schemas chunk by chunk, streamed into a
+# session-local staging table with COPY and merged into the target table with one
+# INSERT ... SELECT ... ON CONFLICT DO UPDATE per chunk, one transaction per chunk.
+# Nested address fields are given as dotted columns (address.street, address.city, ...).
+
+CSV_IMPORT_CHUNK_SIZE = int(os.getenv("CSV_IMPORT_CHUNK_SIZE", "5000"))
+# レポートに含める不正行の最大件数（件数自体はすべて数える）
+CSV_IMPORT_MAX_REJECTED_REPORTED = 1000
+
+# kind -> (model, Create schema, upsert key column)
+# 顧客は自然キーを持たないため、id 列が指定された行のみ既存行を更新する
+IMPORT_TARGETS = {
+    "customers": (models.Customer, schemas.CustomerCreate, "id"),
+    "products": (models.Product, schemas.ProductCreate, "product_code"),
+}
+
+def _nest(row: Dict[str, str]) -> Dict[str, Any]:
+    values: Dict[str, Any] = {}
+    for column, value in row.items():
+        if column is None or value is None or value.strip() == "":
+            continue
+        target = values
+        *parents, field = column.strip().split(".")
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[field] = value.strip()
+    return values
+
+def _validate(
+    reader: Iterable[Dict[str, str]], schema, key: str, report: Dict[str, Any]
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    seen = set()
+    for line, row in enumerate(reader, start=2):
+        values = _nest(row)
+        row_id = values.pop("id", None)
+        try:
+            record = schema(**values).dict()
+        except ValidationError as e:
+            _reject(report, line, [
+                f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in e.errors()
+            ])
+            continue
+        record["id"] = row_id or str(uuid.uuid4())
+        if record[key] in seen:
+            _reject(report, line, [f"Duplicate {key} in file: {record[key]}"])
+            continue
+        seen.add(record[key])
+        yield line, record
+
+def _reject(report: Dict[str, Any], line: int, errors: List[str]) -> None:
+    report["rejected"] += 1
+    if len(report["rejected_rows"]) < CSV_IMPORT_MAX_REJECTED_REPORTED:
+        report["rejected_rows"].append({"line": line, "errors": errors})
+
+def _chunks(records: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _copy_chunk(
+    db: Session, model, columns: List[str], key: str, records: List[Dict[str, Any]], user_id: str
+) -> None:
+    table = model.__tablename__
+    staging = f"import_{table}"
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {staging} "
+        f"(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    ))
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow([
+            json.dumps(record[c]) if isinstance(record[c], dict) else record[c]
+            for c in columns
+        ])
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c not in ("id", key))
+    db.execute(
+        text(
+            f"INSERT INTO {table} ({', '.join(columns)}, created_by) "
+            f"SELECT {', '.join(columns)}, :user_id FROM {staging} "
+            f"ON CONFLICT ({key}) DO UPDATE SET {updates}, "
+            f"updated_at = now(), updated_by = :user_id"
+        ),
+        {"user_id": user_id},
+    )
+
+def import_csv(
+    db: Session,
+    kind: str,
+    stream: TextIO,
+    user_id: str,
+    chunk_size: int = CSV_IMPORT_CHUNK_SIZE,
+) -> Dict[str, Any]:
+    """
+    stream の CSV を kind（customers / products）に取り込み、取り込み件数・不正行・処理時間を返す。
+    チャンク単位でコミットするため、途中で失敗した場合もそれまでのチャンクは反映される。
+    """
+    model, schema, key = IMPORT_TARGETS[kind]
+    columns = ["id", *schema.model_fields]
+    report: Dict[str, Any] = {"imported": 0, "rejected": 0, "rejected_rows": []}
+    started = time.perf_counter()
+
+    records = (record for _, record in _validate(csv.DictReader(stream), schema, key, report))
+    for chunk in _chunks(records, chunk_size):
+        try:
+            _copy_chunk(db, model, columns, key, chunk, user_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        report["imported"] += len(chunk)
+
+    elapsed = time.perf_counter() - started
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["imported"] / elapsed, 1) if elapsed else None
+    return report
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("kind", choices=sorted(IMPORT_TARGETS))
+    parser.add_argument("path")
+    parser.add_argument("--user-email", required=True, help="created_by に記録するユーザー")
+    parser.add_argument("--chunk-size", type=int, default=CSV_IMPORT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_email(db, args.user_email)
+        if user is None:
+            sys.exit(f"User not found: {args.user_email}")
+        with open(args.path, newline="", encoding="utf-8-sig") as stream:
+            report = import_csv(db, args.kind, stream, user.id, args.chunk_size)
+    finally:
+        db.close()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,207 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from bisect import bisect_left
+from threading import Lock
+from typing import Any, Dict, List, Tuple
 import os
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
-SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/us_reporting")
+def _with_driver(url: str, driver: str) -> str:
+    scheme, sep, rest = url.partition("://")
+    return f"{scheme.split('+')[0]}+{driver}{sep}{rest}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+def _to_sync_url(url: str) -> str:
+    # ドライバ未指定の postgresql:// は SQLAlchemy 2.1 以降 psycopg (v3) を選ぶため、
+    # 依存関係に含めている psycopg2 を明示する
+    scheme = url.partition("://")[0]
+    return url if "+" in scheme else _with_driver(url, "psycopg2")
+
+def _to_async_url(url: str) -> str:
+    return _with_driver(url, "asyncpg")
+
+SQLALCHEMY_DATABASE_URL = _to_sync_url(
+    os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/us_reporting")
+)
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _to_async_url(SQLALCHEMY_DATABASE_URL))
+
+# コネクションプール設定
+# DB_MAX_CONNECTIONS を指定した場合は、ワーカー数 (WEB_CONCURRENCY) で割った値を
+# ワーカーごとの上限とし、DB_ASYNC_POOL_SHARE の割合を非同期エンジンに、残りを同期エンジンに
+# 割り当てて、それぞれの pool_size / max_overflow を算出する。
+# DB_POOL_SIZE / DB_MAX_OVERFLOW（同期）、DB_ASYNC_POOL_SIZE / DB_ASYNC_MAX_OVERFLOW（非同期）を
+# 明示した場合はそちらを優先する。
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+DB_ASYNC_POOL_SHARE = float(os.getenv("DB_ASYNC_POOL_SHARE", "0.5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+def _pool_sizing(connections: int) -> Dict[str, int]:
+    pool_size = max(1, connections // 2)
+    return {"pool_size": pool_size, "max_overflow": max(0, connections - pool_size)}
+
+def _default_pool_sizing() -> Tuple[Dict[str, int], Dict[str, int]]:
+    if DB_MAX_CONNECTIONS > 0:
+        per_worker = max(2, DB_MAX_CONNECTIONS // WEB_CONCURRENCY)
+        async_connections = min(per_worker - 1, max(1, int(per_worker * DB_ASYNC_POOL_SHARE)))
+        return _pool_sizing(per_worker - async_connections), _pool_sizing(async_connections)
+    default = {"pool_size": 5, "max_overflow": 10}
+    return default, dict(default)
+
+_sizing, _async_sizing = _default_pool_sizing()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(_sizing["pool_size"])))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", str(_sizing["max_overflow"])))
+DB_ASYNC_POOL_SIZE = int(os.getenv("DB_ASYNC_POOL_SIZE", str(_async_sizing["pool_size"])))
+DB_ASYNC_MAX_OVERFLOW = int(
+    os.getenv("DB_ASYNC_MAX_OVERFLOW", str(_async_sizing["max_overflow"]))
+)
+
+# 接続待ち時間ヒストグラムのバケット境界（秒）
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+class PoolStats:
+    """
+    コネクションの取得待ち時間を集計する。
+    """
+
+    def __init__(self, buckets=POOL_WAIT_BUCKETS):
+        self._lock = Lock()
+        self.buckets = tuple(buckets)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.wait_count = 0
+            self.wait_sum = 0.0
+            self.wait_max = 0.0
+            self.timeouts = 0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect_left(self.buckets, seconds)] += 1
+            self.wait_count += 1
+            self.wait_sum += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def observe_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def histogram(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            counts = list(self.counts)
+        bounds = [str(b) for b in self.buckets] + ["+Inf"]
+        cumulative = 0
+        result = []
+        for bound, count in zip(bounds, counts):
+            cumulative += count
+            result.append({"le": bound, "count": cumulative})
+        return result
+
+pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+class _InstrumentedPool:
+    """
+    接続取得にかかった時間を stats に記録する。
+    """
+
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except Exception:
+            self.stats.observe_timeout()
+            raise
+        self.stats.observe(time.perf_counter() - start)
+        return conn
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    stats = pool_stats
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 非同期エンジン（asyncpg）。イベントループ上で動く読み取り系エンドポイントで使用する
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=DB_ASYNC_POOL_SIZE,
+    max_overflow=DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
+def _pool_status(pool, stats: PoolStats) -> Dict[str, Any]:
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "wait": {
+            "count": stats.wait_count,
+            "sum_seconds": stats.wait_sum,
+            "max_seconds": stats.wait_max,
+            "timeouts": stats.timeouts,
+            "histogram": stats.histogram(),
+        },
+    }
+
+def get_pool_status() -> Dict[str, Any]:
+    return {
+        "config": {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "async_pool_size": DB_ASYNC_POOL_SIZE,
+            "async_max_overflow": DB_ASYNC_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": DB_POOL_PRE_PING,
+            "workers": WEB_CONCURRENCY,
+            "max_connections": DB_MAX_CONNECTIONS or None,
+        },
+        **_pool_status(engine.pool, pool_stats),
+        "async": _pool_status(async_engine.pool, async_pool_stats),
+    }
+
 # データベースセッションの依存性
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# 非同期データベースセッションの依存性
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
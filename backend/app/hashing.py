@@ -0,0 +1,129 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+from typing import Any, Callable, Dict, TypeVar
+
+from passlib.context import CryptContext
+
+from .database import PoolStats
+
+# Dedicated executor for bcrypt. Hashing and verification run on a small fixed set of
+# threads (bcrypt releases the GIL) instead of the request threadpool, so a burst of
+# logins queues here and cannot starve the threads serving other sync endpoints.
+# Jobs beyond the queue limit are rejected immediately rather than piling up.
+# The async variants await the job, freeing the event loop; the sync get_password_hash
+# still blocks its calling thread until the job finishes, so the pool only bounds how
+# many hashes run at once there. Async callers should use get_password_hash_async.
+
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 実行中と待機中を合わせたジョブ数の上限。超えた場合は PasswordHashPoolBusy を送出する
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+T = TypeVar("T")
+
+class PasswordHashPoolBusy(Exception):
+    pass
+
+class PasswordHashPool:
+    """
+    上限付きキューを持つパスワードハッシュ専用のスレッドプール。
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._slots = BoundedSemaphore(max_pending)
+        self._lock = Lock()
+        self.pending = 0
+        self.pending_max = 0
+        self.completed = 0
+        self.rejected = 0
+        # キュー待ち時間。observe_timeout は投入を拒否したジョブ数として使う
+        self.queue_wait = PoolStats()
+        self.run_time = PoolStats()
+
+    def _acquire(self) -> None:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            self.queue_wait.observe_timeout()
+            raise PasswordHashPoolBusy("Too many pending password operations")
+        with self._lock:
+            self.pending += 1
+            self.pending_max = max(self.pending_max, self.pending)
+
+    def _run(self, submitted: float, func: Callable[..., T], *args: Any) -> T:
+        started = time.perf_counter()
+        self.queue_wait.observe(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            self.run_time.observe(time.perf_counter() - started)
+
+    def _release(self, future) -> None:
+        # キャンセルされ実行されなかったジョブも含め、完了時に必ず枠を返す
+        with self._lock:
+            self.pending -= 1
+            if not future.cancelled():
+                self.completed += 1
+        self._slots.release()
+
+    def _submit(self, func: Callable[..., T], *args: Any):
+        self._acquire()
+        try:
+            future = self._executor.submit(self._run, time.perf_counter(), func, *args)
+        except BaseException:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, func: Callable[..., T], *args: Any) -> T:
+        return self._submit(func, *args).result()
+
+    async def run_async(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "pending_max": self.pending_max,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+        count = self.queue_wait.wait_count
+        run_count = self.run_time.wait_count
+        return {
+            **counters,
+            "queue_wait": {
+                "count": count,
+                "avg_ms": self.queue_wait.wait_sum / count * 1000 if count else 0.0,
+                "max_ms": self.queue_wait.wait_max * 1000,
+                "histogram": self.queue_wait.histogram(),
+            },
+            "run_time": {
+                "count": run_count,
+                "avg_ms": self.run_time.wait_sum / run_count * 1000 if run_count else 0.0,
+                "max_ms": self.run_time.wait_max * 1000,
+            },
+        }
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)
+
+def get_password_hash(password: str) -> str:
+    return password_pool.run(pwd_context.hash, password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_pool.run_async(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_pool.run_async(pwd_context.verify, plain_password, hashed_password)
@@ -0,0 +1,158 @@
+import json
+import os
+import time
+from datetime import timedelta
+from hashlib import sha256
+from typing import Any, Callable, Optional, Type
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Idempotency-Key handling for POST endpoints retried by integrations.
+# The first request for a (user, scope, key) claims a row in idempotency_keys with
+# INSERT ... ON CONFLICT DO UPDATE ... WHERE expired, runs the operation and stores the
+# serialized response. Replays return the stored response without running the operation
+# again; a duplicate arriving while the first is still running polls the row until it
+# completes. The table is shared by all workers, unlike the in-process TTL caches.
+
+# 完了したレスポンスの保持期間
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# 処理中の予約の有効期間（ワーカーが異常終了した場合はこの時間で再実行可能になる）
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+# 処理中の重複リクエストが先行リクエストの完了を待つ最大時間
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_POLL_SECONDS = 0.05
+# 期限切れ行の削除はプロセスごとにこの間隔で行う
+IDEMPOTENCY_PURGE_INTERVAL_SECONDS = 300
+
+_last_purge = 0.0
+
+class IdempotencyInProgress(Exception):
+    pass
+
+class IdempotencyKeyReused(Exception):
+    pass
+
+def request_fingerprint(payload: Any) -> str:
+    body = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return sha256(body.encode()).hexdigest()
+
+def _claim(db: Session, user_id: str, scope: str, key: str, fingerprint: str) -> bool:
+    table = models.IdempotencyKey.__table__
+    expires_at = func.now() + timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+    stmt = (
+        insert(table)
+        .values(
+            user_id=user_id,
+            scope=scope,
+            key=key,
+            request_hash=fingerprint,
+            response=None,
+            expires_at=expires_at,
+        )
+        .on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.scope, table.c.key],
+            set_={
+                "request_hash": fingerprint,
+                "response": None,
+                "created_at": func.now(),
+                "expires_at": expires_at,
+            },
+            where=table.c.expires_at < func.now(),
+        )
+        .returning(table.c.key)
+    )
+    claimed = db.execute(stmt).first() is not None
+    db.commit()
+    return claimed
+
+def _release(db: Session, user_id: str, scope: str, key: str) -> None:
+    db.rollback()
+    db.execute(
+        delete(models.IdempotencyKey).where(
+            models.IdempotencyKey.user_id == user_id,
+            models.IdempotencyKey.scope == scope,
+            models.IdempotencyKey.key == key,
+        )
+    )
+    db.commit()
+
+def _purge_expired(db: Session) -> None:
+    global _last_purge
+    now = time.monotonic()
+    if now - _last_purge < IDEMPOTENCY_PURGE_INTERVAL_SECONDS:
+        return
+    _last_purge = now
+    db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at < func.now()))
+    db.commit()
+
+def run_idempotent(
+    db: Session,
+    key: Optional[str],
+    user_id: str,
+    scope: str,
+    payload: Any,
+    response_model: Type[BaseModel],
+    operation: Callable[[], Any],
+) -> Any:
+    """
+    key が指定されていれば operation の結果を response_model でシリアライズして保存し、
+    同じキーの再送には保存済みのレスポンスを返す。key が None の場合はそのまま実行する。
+    operation は対象が見つからない場合なども None を返さず HTTPException を送出すること。
+    例外はキーを解放したうえでそのまま送出し、保存しない。
+    """
+    if not key:
+        return operation()
+
+    _purge_expired(db)
+    fingerprint = request_fingerprint(payload)
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        if _claim(db, user_id, scope, key, fingerprint):
+            try:
+                result = operation()
+                response = jsonable_encoder(
+                    response_model.model_validate(result, from_attributes=True)
+                )
+            except BaseException:
+                # 失敗したリクエストは保存せず、再送で再実行できるようにする
+                _release(db, user_id, scope, key)
+                raise
+            db.execute(
+                update(models.IdempotencyKey)
+                .where(
+                    models.IdempotencyKey.user_id == user_id,
+                    models.IdempotencyKey.scope == scope,
+                    models.IdempotencyKey.key == key,
+                )
+                .values(
+                    response=response,
+                    expires_at=func.now() + timedelta(seconds=IDEMPOTENCY_TTL_SECONDS),
+                )
+            )
+            db.commit()
+            return response
+
+        row = db.execute(
+            select(models.IdempotencyKey.request_hash, models.IdempotencyKey.response).where(
+                models.IdempotencyKey.user_id == user_id,
+                models.IdempotencyKey.scope == scope,
+                models.IdempotencyKey.key == key,
+            )
+        ).first()
+        db.commit()
+        if row is not None:
+            if row.request_hash != fingerprint:
+                raise IdempotencyKeyReused(
+                    "Idempotency-Key was already used with a different request"
+                )
+            if row.response is not None:
+                return row.response
+        if time.monotonic() >= deadline:
+            raise IdempotencyInProgress("A request with this Idempotency-Key is in progress")
+        time.sleep(IDEMPOTENCY_POLL_SECONDS)
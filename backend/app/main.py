@@ -1,6 +1,13 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from .api.api import api_router
+from .crud import ProductNotFound
+from .hashing import PasswordHashPoolBusy
+from .idempotency import IdempotencyInProgress, IdempotencyKeyReused
+from .pagination import InvalidCursor
+from .reference_data import reference_data
+from .sales_tax import sales_tax_rates
 
 app = FastAPI(
     title="US-reporting API",
@@ -17,6 +24,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
+@app.exception_handler(ProductNotFound)
+async def product_not_found_handler(request: Request, exc: ProductNotFound):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": str(exc)},
+    )
+
+@app.exception_handler(IdempotencyInProgress)
+async def idempotency_in_progress_handler(request: Request, exc: IdempotencyInProgress):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": str(exc)},
+    )
+
+@app.exception_handler(IdempotencyKeyReused)
+async def idempotency_key_reused_handler(request: Request, exc: IdempotencyKeyReused):
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": str(exc)},
+    )
+
+@app.exception_handler(PasswordHashPoolBusy)
+async def password_hash_pool_busy_handler(request: Request, exc: PasswordHashPoolBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
+# 参照データを起動時に読み込み、他ワーカーからの変更通知の受信を開始する
+@app.on_event("startup")
+def start_reference_data():
+    reference_data.load_all()
+    reference_data.start()
+    sales_tax_rates.load()
+
+@app.on_event("shutdown")
+def stop_reference_data():
+    reference_data.stop()
+
 # APIルーターの登録
 app.include_router(api_router, prefix="/api/v1")
 
@@ -1,4 +1,7 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Float, DateTime, JSON, Text
+from sqlalchemy import (
+    BigInteger, Boolean, Column, Date, ForeignKey, Index, Integer, String, Float, DateTime, JSON,
+    Text
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -22,11 +25,17 @@ class User(Base):
     approve_invoice_permission = Column(Boolean, default=False)
     manage_revenue_permission = Column(Boolean, default=False)
     admin_permission = Column(Boolean, default=False)
+    # 権限・有効状態の変更で進め、発行済みトークンを失効させる
+    token_version = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index("ix_customers_status_created_at", "status", "created_at", "id"),
+        Index("ix_customers_created_at", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     company_name = Column(String, index=True)
@@ -46,6 +55,11 @@ class Customer(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        Index("ix_products_status_created_at", "status", "created_at", "id"),
+        Index("ix_products_category_created_at", "category", "created_at", "id"),
+        Index("ix_products_created_at", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     product_code = Column(String, unique=True, index=True)
@@ -54,6 +68,8 @@ class Product(Base):
     category = Column(String)
     unit_price = Column(Float)
     tax_rate = Column(Float)
+    # 適用する税率の名前（TaxRate.name）。指定時は伝票日付で有効な税率を優先する
+    tax_rate_name = Column(String)
     unit = Column(String)
     minimum_quantity = Column(Integer)
     status = Column(String)
@@ -65,6 +81,12 @@ class Product(Base):
 
 class Quotation(Base):
     __tablename__ = "quotations"
+    __table_args__ = (
+        Index("ix_quotations_status_created_at", "status", "created_at", "id"),
+        Index("ix_quotations_customer_id_created_at", "customer_id", "created_at", "id"),
+        Index("ix_quotations_approver_id_status", "approver_id", "status"),
+        Index("ix_quotations_created_at", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     quotation_number = Column(String, unique=True, index=True)
@@ -88,6 +110,9 @@ class Quotation(Base):
 
 class QuotationItem(Base):
     __tablename__ = "quotation_items"
+    __table_args__ = (
+        Index("ix_quotation_items_quotation_id_sort_order", "quotation_id", "sort_order"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     quotation_id = Column(String, ForeignKey("quotations.id"))
@@ -107,6 +132,20 @@ class QuotationItem(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_status_created_at", "status", "created_at", "id"),
+        Index("ix_invoices_customer_id_created_at", "customer_id", "created_at", "id"),
+        Index("ix_invoices_approver_id_status", "approver_id", "status"),
+        Index("ix_invoices_created_at", "created_at", "id"),
+        Index("ix_invoices_customer_id_balance_due", "customer_id", "balance_due"),
+        # 売上レポートの集計を請求書本体を読まずにインデックスのみで行う
+        Index(
+            "ix_invoices_status_invoice_date",
+            "status",
+            "invoice_date",
+            postgresql_include=["customer_id", "subtotal", "tax_amount", "total_amount"],
+        ),
+    )
 
     id = Column(String, primary_key=True, index=True)
     invoice_number = Column(String, unique=True, index=True)
@@ -116,6 +155,9 @@ class Invoice(Base):
     subtotal = Column(Float)
     tax_amount = Column(Float)
     total_amount = Column(Float)
+    # 入金累計と残高（入金登録時に SQL で原子的に更新する）
+    amount_paid = Column(Float, nullable=False, default=0, server_default="0")
+    balance_due = Column(Float)
     status = Column(String)
     payment_status = Column(String)
     payment_terms = Column(String)
@@ -133,6 +175,9 @@ class Invoice(Base):
 
 class InvoiceItem(Base):
     __tablename__ = "invoice_items"
+    __table_args__ = (
+        Index("ix_invoice_items_invoice_id_sort_order", "invoice_id", "sort_order"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     invoice_id = Column(String, ForeignKey("invoices.id"))
@@ -152,6 +197,9 @@ class InvoiceItem(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_invoice_id", "invoice_id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     invoice_id = Column(String, ForeignKey("invoices.id"))
@@ -211,4 +259,52 @@ class SystemSetting(Base):
     quotation = Column(JSON)
     email = Column(JSON)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
-    updated_by = Column(String, ForeignKey("users.id")) 
\ No newline at end of file
+    updated_by = Column(String, ForeignKey("users.id"))
+
+class DocumentNumberSeries(Base):
+    __tablename__ = "document_number_series"
+
+    document_type = Column(String, primary_key=True)
+    prefix = Column(String, primary_key=True)
+    period = Column(String, primary_key=True, default="")
+    next_value = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        Index("ix_idempotency_keys_expires_at", "expires_at"),
+    )
+
+    user_id = Column(String, primary_key=True)
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    request_hash = Column(String, nullable=False)
+    response = Column(JSON)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class MonthlyProductSales(Base):
+    # 発行済み請求書の月 × 顧客 × 商品ごとの明細集計（sales_summary で差分更新する）
+    __tablename__ = "monthly_product_sales"
+
+    month = Column(Date, primary_key=True)
+    customer_id = Column(String, primary_key=True)
+    product_id = Column(String, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(BigInteger, nullable=False, default=0)
+    subtotal = Column(Float, nullable=False, default=0)
+    tax_amount = Column(Float, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+
+class MonthlyCustomerSales(Base):
+    # 発行済み請求書の月 × 顧客ごとの請求額と入金額の集計
+    __tablename__ = "monthly_customer_sales"
+
+    month = Column(Date, primary_key=True)
+    customer_id = Column(String, primary_key=True)
+    invoice_count = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Float, nullable=False, default=0)
+    tax_amount = Column(Float, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+    amount_paid = Column(Float, nullable=False, default=0)
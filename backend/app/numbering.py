@@ -0,0 +1,98 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from . import models
+from .reference_data import reference_data
+
+# Document number allocation backed by the document_number_series counter table.
+# Each (document_type, prefix, period) series is a single row; allocation is an
+# INSERT ... ON CONFLICT DO UPDATE ... RETURNING, which takes the row lock and
+# bumps the counter in one statement. The lock is held until the caller's
+# transaction ends, so concurrent creates never see the same value and a rolled
+# back create does not leave a gap.
+
+DEFAULT_PREFIXES = {"invoice": "INV", "quotation": "Q"}
+
+def _series_settings(db: Session, document_type: str) -> Tuple[str, str, int]:
+    rows = reference_data.rows("system_settings")
+    setting = rows[0] if rows else None
+    options = (getattr(setting, document_type, None) or {}) if setting else {}
+    prefix = options.get("prefix") or DEFAULT_PREFIXES[document_type]
+    reset = options.get("number_reset") or "never"
+    start = int(options.get("next_number") or 1)
+    return prefix, reset, start
+
+def _period(reset: str, document_date: datetime) -> str:
+    if reset == "yearly":
+        return document_date.strftime("%Y")
+    if reset == "monthly":
+        return document_date.strftime("%Y%m")
+    return ""
+
+def format_number(prefix: str, period: str, value: int) -> str:
+    if period:
+        return f"{prefix}-{period}-{value:04d}"
+    return f"{prefix}-{value:04d}"
+
+def _allocate_block(
+    db: Session, document_type: str, prefix: str, period: str, start: int, count: int
+) -> List[str]:
+    series = models.DocumentNumberSeries.__table__
+    stmt = (
+        insert(series)
+        .values(
+            document_type=document_type,
+            prefix=prefix,
+            period=period,
+            next_value=start + count,
+        )
+        .on_conflict_do_update(
+            index_elements=[series.c.document_type, series.c.prefix, series.c.period],
+            set_={"next_value": series.c.next_value + count},
+        )
+        .returning(series.c.next_value)
+    )
+    first = db.execute(stmt).scalar_one() - count
+    return [format_number(prefix, period, first + i) for i in range(count)]
+
+def allocate_numbers(
+    db: Session,
+    document_type: str,
+    count: int = 1,
+    document_date: Optional[datetime] = None,
+) -> List[str]:
+    """
+    document_type（invoice / quotation）の番号を count 件まとめて払い出す。
+    プレフィックス・リセット周期・開始番号は SystemSetting の invoice / quotation 設定に従う。
+    """
+    prefix, reset, start = _series_settings(db, document_type)
+    period = _period(reset, document_date or datetime.utcnow())
+    return _allocate_block(db, document_type, prefix, period, start, count)
+
+def allocate_numbers_for_dates(
+    db: Session, document_type: str, document_dates: Sequence[Optional[datetime]]
+) -> List[str]:
+    """
+    document_dates の各日付に対応する番号を、期間ごとに 1 文でまとめて払い出す。
+    戻り値は document_dates と同じ順序。
+    """
+    prefix, reset, start = _series_settings(db, document_type)
+    now = datetime.utcnow()
+    positions: Dict[str, List[int]] = {}
+    for index, document_date in enumerate(document_dates):
+        positions.setdefault(_period(reset, document_date or now), []).append(index)
+
+    numbers: List[str] = [""] * len(document_dates)
+    for period, indexes in sorted(positions.items()):
+        block = _allocate_block(db, document_type, prefix, period, start, len(indexes))
+        for index, number in zip(indexes, block):
+            numbers[index] = number
+    return numbers
+
+def next_number(
+    db: Session, document_type: str, document_date: Optional[datetime] = None
+) -> str:
+    return allocate_numbers(db, document_type, 1, document_date)[0]
@@ -0,0 +1,103 @@
+import json
+import math
+import uuid
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, asc, desc, or_, tuple_
+
+# Keyset (cursor) pagination helpers shared by crud and async_crud.
+# A cursor encodes the (sort column value, id) of the last row of a page; the next
+# page seeks past it with a row-value comparison instead of OFFSET, so deep pages
+# cost the same as the first one.
+# NULL sort values are ordered last ascending and first descending (the PostgreSQL
+# defaults, spelled out in ORDER BY) and the seek predicate follows the same placement,
+# so pages ending on or crossing NULL rows continue where they left off.
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value: Any, row_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        value = {"dt": sort_value.isoformat()}
+    else:
+        value = {"v": sort_value}
+    payload = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(urlsafe_b64decode(padded.encode()))
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"]), row_id
+        return value["v"], row_id
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+def _may_be_null(column) -> bool:
+    # Columns filled by the database on insert (created_at) are treated as never NULL,
+    # which keeps their seek predicate a plain row-value comparison the index can use
+    return bool(column.nullable) and column.server_default is None
+
+def keyset_order_by(model, sort_by: str, sort_order: str) -> List[Any]:
+    column = getattr(model, sort_by)
+    if sort_order == "desc":
+        return [desc(column).nulls_first(), desc(model.id)]
+    return [asc(column).nulls_last(), asc(model.id)]
+
+def keyset_filter(model, sort_by: str, sort_order: str, cursor: str):
+    sort_value, row_id = decode_cursor(cursor)
+    column = getattr(model, sort_by)
+    if sort_value is None:
+        # The page ended inside the NULL group: finish it, then (descending) move on to
+        # the non-NULL rows that follow it
+        if sort_order == "desc":
+            return or_(and_(column.is_(None), model.id < row_id), column.isnot(None))
+        return and_(column.is_(None), model.id > row_id)
+    key = tuple_(column, model.id)
+    if sort_order == "desc":
+        return key < tuple_(sort_value, row_id)
+    after = key > tuple_(sort_value, row_id)
+    return or_(after, column.is_(None)) if _may_be_null(column) else after
+
+def next_cursor(rows: Sequence[Any], sort_by: str, limit: int) -> Optional[str]:
+    if limit <= 0 or len(rows) < limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(getattr(last, sort_by), last.id)
+
+def build_page(
+    rows: Sequence[Any],
+    skip: int,
+    limit: int,
+    sort_by: str,
+    cursor: Optional[str],
+    total: Optional[int],
+    total_is_estimate: bool = False,
+) -> Dict[str, Any]:
+    """
+    API仕様書の標準レスポンス形式（data + meta.pagination）を組み立てる。
+    カーソル指定時はページ番号を返さない。
+    """
+    cursor_value = next_cursor(rows, sort_by, limit)
+    pagination = {
+        "page": None if cursor or limit <= 0 else skip // limit + 1,
+        "per_page": limit,
+        "total_items": total,
+        "total_pages": math.ceil(total / limit) if total is not None and limit > 0 else None,
+        "total_is_estimate": total_is_estimate,
+        "has_next_page": cursor_value is not None,
+        "has_prev_page": bool(cursor) or skip > 0,
+        "next_cursor": cursor_value,
+    }
+    return {
+        "success": True,
+        "data": list(rows),
+        "meta": {
+            "pagination": pagination,
+            "timestamp": datetime.utcnow(),
+            "request_id": f"req-{uuid.uuid4().hex[:12]}",
+        },
+    }
@@ -0,0 +1,181 @@
+import logging
+import os
+import select
+import time
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal, engine
+
+# Process-local cache of reference data (system settings, tax rates, payment terms,
+# email templates). Each table is loaded in full on first use and kept as detached,
+# read-only ORM objects. Writers send pg_notify('reference_data', <table>) inside their
+# transaction, so the notification is delivered on commit; a listener thread in every
+# worker LISTENs on that channel and drops the affected table. Entries also expire
+# after REFERENCE_DATA_TTL_SECONDS in case a notification is missed.
+# Other payloads on the channel are dispatched to callbacks registered with subscribe().
+# Objects returned from here are shared between requests and must not be modified;
+# write paths keep loading rows through their own session.
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_DATA_TTL_SECONDS = float(os.getenv("REFERENCE_DATA_TTL_SECONDS", "300"))
+# LISTEN 接続の再接続間隔（秒）
+REFERENCE_DATA_RECONNECT_SECONDS = 5.0
+NOTIFY_CHANNEL = "reference_data"
+
+TABLES = {
+    model.__tablename__: model
+    for model in (models.SystemSetting, models.TaxRate, models.PaymentTerm, models.EmailTemplate)
+}
+
+class ReferenceDataCache:
+    """
+    参照データのテーブル単位のスナップショットを保持する。
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshots: Dict[str, Any] = {}
+        # テーブルの内容が変わった可能性があるたびに進める。派生した索引の再構築判定に使う
+        self._versions: Dict[str, int] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.loads = 0
+        self.notifications = 0
+        self.listening = False
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._subscribers: Dict[str, Callable[[], Any]] = {}
+
+    def rows(self, table: str) -> List[Any]:
+        now = time.monotonic()
+        snapshot = self._snapshots.get(table)
+        if snapshot is not None and snapshot[0] > now:
+            self.hits += 1
+            return snapshot[1]
+        with self._lock:
+            snapshot = self._snapshots.get(table)
+            if snapshot is not None and snapshot[0] > time.monotonic():
+                return snapshot[1]
+            if snapshot is not None:
+                # TTL 切れによる再読み込みは通知の取りこぼしを補うためのもの
+                self._versions[table] = self._versions.get(table, 0) + 1
+            db = SessionLocal()
+            try:
+                rows = db.query(TABLES[table]).all()
+                db.expunge_all()
+            finally:
+                db.close()
+            self._snapshots[table] = (time.monotonic() + self.ttl, rows)
+            self.loads += 1
+            return rows
+
+    def version(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            for name in TABLES if table is None else (table,):
+                self._snapshots.pop(name, None)
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def load_all(self) -> None:
+        for table in TABLES:
+            self.rows(table)
+
+    # LISTEN/NOTIFY
+    def subscribe(self, payload: str, callback: Callable[[], Any]) -> None:
+        """
+        テーブル名以外の通知 payload を受け取ったときに callback を呼び出す。
+        callback はリスナースレッドで実行されるため、すぐに戻る必要がある。
+        """
+        self._subscribers[payload] = callback
+
+    def _dispatch(self, payload: str) -> None:
+        callback = self._subscribers.get(payload)
+        if callback is not None:
+            callback()
+        else:
+            self.invalidate(payload if payload in TABLES else None)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._listen, name="reference-data-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=REFERENCE_DATA_RECONNECT_SECONDS)
+            self._thread = None
+
+    def _listen(self) -> None:
+        reconnecting = False
+        while not self._stop.is_set():
+            conn = None
+            try:
+                cargs, cparams = engine.dialect.create_connect_args(engine.url)
+                conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+                conn.autocommit = True
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                # 接続が切れていた間の通知は失われるため、再接続時は全体を破棄する
+                if reconnecting:
+                    self.invalidate()
+                reconnecting = True
+                self.listening = True
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            notify = conn.notifies.pop(0)
+                            self.notifications += 1
+                            self._dispatch(notify.payload)
+            except Exception:
+                reconnecting = True
+                logger.exception("reference data listener failed; reconnecting")
+            finally:
+                self.listening = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop.wait(REFERENCE_DATA_RECONNECT_SECONDS)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": sorted(self._snapshots),
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "loads": self.loads,
+            "notifications": self.notifications,
+            "listening": self.listening,
+        }
+
+reference_data = ReferenceDataCache(REFERENCE_DATA_TTL_SECONDS)
+
+def notify_changed(db: Session, table: str) -> None:
+    """
+    table の変更を全ワーカーに通知する。通知はトランザクションのコミット時に配送される。
+    subscribe() で登録した payload を渡すこともできる。
+    """
+    db.execute(
+        text("SELECT pg_notify(:channel, :table)"), {"channel": NOTIFY_CHANNEL, "table": table}
+    )
+
+def sorted_page(rows: List[Any], skip: int, limit: int, sort_by: str, sort_order: str) -> List[Any]:
+    # None は昇順で末尾、降順で先頭に並べる（PostgreSQL の NULLS の既定と同じ）
+    ordered = sorted(
+        rows,
+        key=lambda row: (getattr(row, sort_by) is None, getattr(row, sort_by)),
+        reverse=sort_order == "desc",
+    )
+    return ordered[skip:skip + limit]
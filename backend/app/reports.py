@@ -0,0 +1,233 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Tuple
+
+from sqlalchemy import BigInteger, DateTime, Select, cast, func, select
+
+from . import models
+from .database import engine
+from .sales_summary import SUMMARY_STATUS
+
+# Sales report aggregated entirely in SQL.
+# Reports not broken down by product sum the invoice headers; reports grouped or filtered by
+# product sum invoice_items joined to their invoice. Either way PostgreSQL does the GROUP BY
+# and the aggregated rows are fetched through a server-side cursor and streamed to the
+# client in chunks, so neither the invoices nor the result set are held in memory.
+# Reports over whole months of issued invoices read the monthly summary tables maintained
+# by sales_summary instead, which hold a few rows per customer and product per month.
+
+SalesGroup = Literal["period", "customer", "product"]
+SalesPeriod = Literal["day", "week", "month", "quarter", "year"]
+ReportFormat = Literal["json", "csv"]
+
+# 売上として集計する請求書のステータス
+SALES_STATUSES = (SUMMARY_STATUS,)
+# サーバーサイドカーソルから一度に取得する行数
+REPORT_FETCH_SIZE = int(os.getenv("REPORT_FETCH_SIZE", "1000"))
+# レスポンスに書き出す 1 チャンクのおおよその大きさ（文字数）
+REPORT_CHUNK_BYTES = 64 * 1024
+
+def _group_columns(
+    group_by: Sequence[SalesGroup], period: SalesPeriod, period_source, customer_id, product_id
+) -> Tuple[List[Any], List[Any]]:
+    # Grouping columns of the report and the GROUP BY / ORDER BY keys behind them
+    columns: List[Any] = []
+    keys: List[Any] = []
+    if "period" in group_by:
+        period_start = func.date_trunc(period, period_source)
+        columns.append(period_start.label("period"))
+        keys.append(period_start)
+    if "customer" in group_by:
+        columns += [
+            customer_id.label("customer_id"),
+            models.Customer.company_name.label("customer_name"),
+        ]
+        keys += [customer_id, models.Customer.company_name]
+    if "product" in group_by:
+        columns += [
+            product_id.label("product_id"),
+            models.Product.product_code.label("product_code"),
+            models.Product.product_name.label("product_name"),
+        ]
+        keys += [product_id, models.Product.product_code, models.Product.product_name]
+    return columns, keys
+
+def _quantity_sum(quantity):
+    # SUM(bigint) is numeric in PostgreSQL; cast back so both paths return an int
+    return cast(func.coalesce(func.sum(quantity), 0), BigInteger).label("quantity")
+
+def covered_by_summary(
+    period: SalesPeriod,
+    date_from: Optional[date],
+    date_to: Optional[date],
+    statuses: Sequence[str] = SALES_STATUSES,
+) -> bool:
+    # The monthly summaries answer reports whose periods and date range are whole months
+    return (
+        tuple(statuses) == (SUMMARY_STATUS,)
+        and period in ("month", "quarter", "year")
+        and (date_from is None or date_from.day == 1)
+        and (date_to is None or (date_to + timedelta(days=1)).day == 1)
+    )
+
+def summary_report_query(
+    group_by: Sequence[SalesGroup],
+    period: SalesPeriod = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    customer_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+) -> Select:
+    by_product = "product" in group_by or product_id is not None
+    table = models.MonthlyProductSales if by_product else models.MonthlyCustomerSales
+    columns, keys = _group_columns(
+        group_by,
+        period,
+        cast(table.month, DateTime),
+        table.customer_id,
+        getattr(table, "product_id", None),
+    )
+    columns.append(func.coalesce(func.sum(table.invoice_count), 0).label("invoice_count"))
+    if by_product:
+        columns.append(_quantity_sum(table.quantity))
+    columns += [
+        func.coalesce(func.sum(table.subtotal), 0.0).label("subtotal"),
+        func.coalesce(func.sum(table.tax_amount), 0.0).label("tax_amount"),
+        func.coalesce(func.sum(table.total_amount), 0.0).label("total_amount"),
+    ]
+
+    query = select(*columns).select_from(table)
+    if "customer" in group_by:
+        query = query.outerjoin(models.Customer, models.Customer.id == table.customer_id)
+    if "product" in group_by:
+        query = query.outerjoin(models.Product, models.Product.id == table.product_id)
+
+    if date_from is not None:
+        query = query.where(table.month >= date_from)
+    if date_to is not None:
+        query = query.where(table.month <= date_to)
+    if customer_id is not None:
+        query = query.where(table.customer_id == customer_id)
+    if product_id is not None:
+        query = query.where(table.product_id == product_id)
+    if keys:
+        # 差分更新で件数が 0 になった行は出力しない
+        query = query.group_by(*keys).having(func.sum(table.invoice_count) > 0).order_by(*keys)
+    return query
+
+def sales_report_query(
+    group_by: Sequence[SalesGroup],
+    period: SalesPeriod = "month",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    customer_id: Optional[str] = None,
+    product_id: Optional[str] = None,
+    statuses: Sequence[str] = SALES_STATUSES,
+    use_summary: bool = True,
+) -> Select:
+    # date_from / date_to are inclusive invoice dates
+    if use_summary and covered_by_summary(period, date_from, date_to, statuses):
+        return summary_report_query(
+            group_by, period, date_from, date_to, customer_id, product_id
+        )
+
+    invoice = models.Invoice
+    by_product = "product" in group_by or product_id is not None
+    source = models.InvoiceItem if by_product else invoice
+
+    columns, keys = _group_columns(
+        group_by, period, invoice.invoice_date, invoice.customer_id, models.InvoiceItem.product_id
+    )
+    columns.append(
+        func.count(func.distinct(invoice.id) if by_product else invoice.id).label("invoice_count")
+    )
+    if by_product:
+        columns.append(_quantity_sum(models.InvoiceItem.quantity))
+    columns += [
+        func.coalesce(func.sum(source.subtotal), 0.0).label("subtotal"),
+        func.coalesce(func.sum(source.tax_amount), 0.0).label("tax_amount"),
+        func.coalesce(func.sum(source.total_amount), 0.0).label("total_amount"),
+    ]
+
+    query = select(*columns).select_from(invoice)
+    if by_product:
+        query = query.join(models.InvoiceItem, models.InvoiceItem.invoice_id == invoice.id)
+    if "customer" in group_by:
+        query = query.outerjoin(models.Customer, models.Customer.id == invoice.customer_id)
+    if "product" in group_by:
+        query = query.outerjoin(models.Product, models.Product.id == models.InvoiceItem.product_id)
+
+    # Same rows as the monthly summaries, which cannot key a NULL date, customer or product
+    query = query.where(
+        invoice.status.in_(statuses),
+        invoice.invoice_date.isnot(None),
+        invoice.customer_id.isnot(None),
+    )
+    if by_product:
+        query = query.where(models.InvoiceItem.product_id.isnot(None))
+    if date_from is not None:
+        query = query.where(invoice.invoice_date >= datetime.combine(date_from, time.min))
+    if date_to is not None:
+        end = datetime.combine(date_to + timedelta(days=1), time.min)
+        query = query.where(invoice.invoice_date < end)
+    if customer_id is not None:
+        query = query.where(invoice.customer_id == customer_id)
+    if product_id is not None:
+        query = query.where(models.InvoiceItem.product_id == product_id)
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+    return query
+
+def iter_report_rows(
+    query: Select, fetch_size: int = REPORT_FETCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=fetch_size).execute(query)
+        for row in result.mappings():
+            row = dict(row)
+            if isinstance(row.get("period"), datetime):
+                row["period"] = row["period"].date().isoformat()
+            yield row
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+def _drain(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+def stream_report(query: Select, fmt: ReportFormat) -> Iterator[str]:
+    """
+    集計結果を JSON 配列または CSV として REPORT_CHUNK_BYTES 程度ずつ書き出す。
+    """
+    buffer = io.StringIO()
+    rows = iter_report_rows(query)
+    # 途中で失敗しても、サーバーサイドカーソルの接続をすぐに返す
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(buffer, fieldnames=[c.name for c in query.selected_columns])
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                if buffer.tell() >= REPORT_CHUNK_BYTES:
+                    yield _drain(buffer)
+        else:
+            buffer.write("[")
+            for index, row in enumerate(rows):
+                if index:
+                    buffer.write(",")
+                json.dump(row, buffer, ensure_ascii=False, default=_json_default)
+                if buffer.tell() >= REPORT_CHUNK_BYTES:
+                    yield _drain(buffer)
+            buffer.write("]")
+    finally:
+        rows.close()
+    yield _drain(buffer)
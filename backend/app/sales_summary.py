@@ -0,0 +1,184 @@
+"""
+月次売上集計テーブルの再構築。
+
+    cd backend && python -m app.sales_summary --from-month 2024-01
+
+--from-month を省略すると全期間を再構築する。
+"""
+import argparse
+import json
+from datetime import date, datetime, time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Date, Float, cast, delete, func, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+# Monthly sales summaries maintained incrementally from the crud layer.
+# monthly_product_sales holds one row per (month, customer, product) with line totals and
+# monthly_customer_sales one row per (month, customer) with invoice totals and payments.
+# Only issued invoices are counted, bucketed by the month of invoice_date. Writers call
+# add_invoices / remove_invoices / add_payment inside their own transaction; each is one
+# INSERT ... SELECT ... GROUP BY ... ON CONFLICT DO UPDATE per table adding the signed
+# contribution, so concurrent writers to the same bucket serialize on its row lock and the
+# summary commits or rolls back together with the invoice change.
+# rebuild() recomputes the tables from the invoices for backfills and to clear any drift.
+
+SUMMARY_STATUS = "issued"
+
+PRODUCT_KEYS = ["month", "customer_id", "product_id"]
+CUSTOMER_KEYS = ["month", "customer_id"]
+
+def _month(column):
+    return cast(func.date_trunc("month", column), Date)
+
+def _summarized(*conditions) -> List[Any]:
+    invoice = models.Invoice
+    return [
+        invoice.status == SUMMARY_STATUS,
+        invoice.invoice_date.isnot(None),
+        invoice.customer_id.isnot(None),
+        *conditions,
+    ]
+
+def _product_contributions(sign: int, conditions: List[Any]):
+    invoice, item = models.Invoice, models.InvoiceItem
+    month = _month(invoice.invoice_date)
+    return (
+        select(
+            month,
+            invoice.customer_id,
+            item.product_id,
+            func.count(func.distinct(invoice.id)) * sign,
+            func.coalesce(func.sum(item.quantity), 0) * sign,
+            func.coalesce(func.sum(item.subtotal), 0.0) * sign,
+            func.coalesce(func.sum(item.tax_amount), 0.0) * sign,
+            func.coalesce(func.sum(item.total_amount), 0.0) * sign,
+        )
+        .select_from(invoice)
+        .join(item, item.invoice_id == invoice.id)
+        .where(*conditions, item.product_id.isnot(None))
+        .group_by(month, invoice.customer_id, item.product_id)
+    )
+
+def _customer_contributions(sign: int, conditions: List[Any]):
+    invoice = models.Invoice
+    month = _month(invoice.invoice_date)
+    return (
+        select(
+            month,
+            invoice.customer_id,
+            func.count(invoice.id) * sign,
+            func.coalesce(func.sum(invoice.subtotal), 0.0) * sign,
+            func.coalesce(func.sum(invoice.tax_amount), 0.0) * sign,
+            func.coalesce(func.sum(invoice.total_amount), 0.0) * sign,
+            func.coalesce(func.sum(invoice.amount_paid), 0.0) * sign,
+        )
+        .where(*conditions)
+        .group_by(month, invoice.customer_id)
+    )
+
+def _merge(db: Session, model, contributions, keys: List[str]) -> None:
+    # Column order of the contribution SELECT matches the table definition
+    columns = [column.name for column in model.__table__.columns]
+    stmt = pg_insert(model).from_select(columns, contributions)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={
+            name: getattr(model, name) + getattr(stmt.excluded, name)
+            for name in columns
+            if name not in keys
+        },
+    )
+    db.execute(stmt)
+
+def _apply(db: Session, invoice_ids: List[str], sign: int) -> None:
+    if not invoice_ids:
+        return
+    conditions = _summarized(models.Invoice.id.in_(invoice_ids))
+    _merge(db, models.MonthlyProductSales, _product_contributions(sign, conditions), PRODUCT_KEYS)
+    _merge(
+        db, models.MonthlyCustomerSales, _customer_contributions(sign, conditions), CUSTOMER_KEYS
+    )
+
+def add_invoices(db: Session, invoice_ids: List[str]) -> None:
+    """
+    発行済みの請求書を集計に加える。変更内容がフラッシュされた後に呼び出すこと。
+    """
+    _apply(db, invoice_ids, 1)
+
+def remove_invoices(db: Session, invoice_ids: List[str]) -> None:
+    """
+    発行済みの請求書を集計から除く。請求書を変更する前に呼び出すこと。
+    """
+    _apply(db, invoice_ids, -1)
+
+def add_payment(db: Session, invoice_id: str, amount: float) -> None:
+    """
+    発行済みの請求書への入金額を請求月の集計に加える。
+    """
+    invoice = models.Invoice
+    contributions = select(
+        _month(invoice.invoice_date),
+        invoice.customer_id,
+        literal(0),
+        literal(0.0, Float),
+        literal(0.0, Float),
+        literal(0.0, Float),
+        literal(amount, Float),
+    ).where(*_summarized(invoice.id == invoice_id))
+    _merge(db, models.MonthlyCustomerSales, contributions, CUSTOMER_KEYS)
+
+def rebuild(db: Session, month_from: Optional[date] = None) -> Dict[str, Any]:
+    """
+    month_from 以降（省略時は全期間）の集計を請求書から再計算する。
+    再構築中は集計テーブルをロックするため、同時に行われる発行・更新・入金は完了まで待たされる。
+    """
+    # SHARE ROW EXCLUSIVE conflicts with the row locks taken by incremental writers, so every
+    # change is either committed before the rebuild reads the invoices or applied after it
+    for model in (models.MonthlyProductSales, models.MonthlyCustomerSales):
+        db.execute(text(f"LOCK TABLE {model.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+    conditions = []
+    if month_from is not None:
+        month_from = month_from.replace(day=1)
+        conditions.append(models.Invoice.invoice_date >= datetime.combine(month_from, time.min))
+    conditions = _summarized(*conditions)
+
+    counts = {}
+    targets = (
+        (models.MonthlyProductSales, _product_contributions(1, conditions)),
+        (models.MonthlyCustomerSales, _customer_contributions(1, conditions)),
+    )
+    for model, contributions in targets:
+        stale = delete(model)
+        if month_from is not None:
+            stale = stale.where(model.month >= month_from)
+        db.execute(stale)
+        columns = [column.name for column in model.__table__.columns]
+        result = db.execute(pg_insert(model).from_select(columns, contributions))
+        counts[model.__tablename__] = result.rowcount
+    db.commit()
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--from-month",
+        type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+        help="再構築を開始する月（YYYY-MM）",
+    )
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        counts = rebuild(db, args.from_month)
+    finally:
+        db.close()
+    print(json.dumps(counts, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
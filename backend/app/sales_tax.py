@@ -0,0 +1,145 @@
+import csv
+import logging
+import math
+import os
+import time
+from array import array
+from threading import Lock, Thread
+from typing import Any, Dict, Optional, Tuple
+
+from .reference_data import reference_data
+
+# US sales-tax jurisdiction rates loaded from a local CSV (SALES_TAX_RATES_CSV).
+# ZIP codes are stored in a flat array of 100,000 doubles indexed by the 5-digit ZIP
+# (NaN = no entry), with dicts for the much smaller county and state levels, so a lookup
+# is an array index or a dict get. A reload builds a complete new table off the request
+# path and swaps it in with one reference assignment; readers never see a partial table.
+#
+# CSV columns (header names are case-insensitive):
+#   state, county (optional), zip (optional), rate   e.g.  CA,,94105,0.08625
+# A row with zip sets the ZIP rate, a row with county but no zip the county rate and a
+# row with only state the state-wide rate. Rates are combined rates as fractions.
+# A reload requested through pg_notify('reference_data', 'sales_tax') runs in every worker.
+
+logger = logging.getLogger(__name__)
+
+SALES_TAX_RATES_CSV = os.getenv("SALES_TAX_RATES_CSV", "")
+NOTIFY_PAYLOAD = "sales_tax"
+US_COUNTRIES = {"US", "USA", "UNITED STATES", "UNITED STATES OF AMERICA"}
+
+class JurisdictionTable:
+    """
+    ZIP → 州・郡 → 州の順で合算税率を引くための読み取り専用テーブル。
+    """
+
+    def __init__(self):
+        self.zip_rates = array("d", [math.nan]) * 100000
+        self.county_rates: Dict[Tuple[str, str], float] = {}
+        self.state_rates: Dict[str, float] = {}
+        self.zip_count = 0
+
+    @classmethod
+    def from_csv(cls, path: str) -> "JurisdictionTable":
+        table = cls()
+        with open(path, newline="", encoding="utf-8-sig") as stream:
+            for row in csv.DictReader(stream):
+                row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+                rate = float(row["rate"])
+                state = row["state"].upper()
+                zip_code = row.get("zip", "")[:5]
+                county = row.get("county", "").upper()
+                if zip_code:
+                    if not table.has_zip(zip_code):
+                        table.zip_count += 1
+                    table.zip_rates[int(zip_code)] = rate
+                elif county:
+                    table.county_rates[(state, county)] = rate
+                else:
+                    table.state_rates[state] = rate
+        return table
+
+    def has_zip(self, zip_code: str) -> bool:
+        return not math.isnan(self.zip_rates[int(zip_code)])
+
+    def lookup(
+        self, state: str, zip_code: Optional[str] = None, county: Optional[str] = None
+    ) -> Optional[float]:
+        zip5 = (zip_code or "").strip()[:5]
+        if len(zip5) == 5 and zip5.isdigit():
+            rate = self.zip_rates[int(zip5)]
+            if not math.isnan(rate):
+                return rate
+        state = state.strip().upper()
+        if county:
+            rate = self.county_rates.get((state, county.strip().upper()))
+            if rate is not None:
+                return rate
+        return self.state_rates.get(state)
+
+    def __len__(self) -> int:
+        return self.zip_count + len(self.county_rates) + len(self.state_rates)
+
+class SalesTaxRates:
+    """
+    現在のテーブルへの参照を保持し、再読み込みをバックグラウンドで行う。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table: Optional[JurisdictionTable] = None
+        self.loaded_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._reload_lock = Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.table is not None and len(self.table) > 0
+
+    def load(self) -> None:
+        if not self.path:
+            return
+        with self._reload_lock:
+            try:
+                table = JurisdictionTable.from_csv(self.path)
+            except (OSError, KeyError, ValueError) as e:
+                # 読み込みに失敗した場合は直前のテーブルを使い続ける
+                self.last_error = f"{e.__class__.__name__}: {e}"
+                logger.exception("failed to load sales tax rates from %s", self.path)
+                return
+            self.table = table
+            self.loaded_at = time.time()
+            self.last_error = None
+
+    def reload_in_background(self) -> bool:
+        """
+        再読み込みを別スレッドで開始する。既に実行中の場合は False を返す。
+        """
+        if not self.path or self._reload_lock.locked():
+            return False
+        Thread(target=self.load, name="sales-tax-reload", daemon=True).start()
+        return True
+
+    def rate_for_address(self, address: Optional[Dict[str, Any]]) -> Optional[float]:
+        table = self.table
+        if table is None or not address:
+            return None
+        if str(address.get("country", "")).strip().upper() not in US_COUNTRIES:
+            return None
+        return table.lookup(
+            str(address.get("state", "")), address.get("postal_code"), address.get("county")
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        table = self.table
+        return {
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "zip_codes": table.zip_count if table else 0,
+            "counties": len(table.county_rates) if table else 0,
+            "states": len(table.state_rates) if table else 0,
+            "reloading": self._reload_lock.locked(),
+            "last_error": self.last_error,
+        }
+
+sales_tax_rates = SalesTaxRates(SALES_TAX_RATES_CSV)
+reference_data.subscribe(NOTIFY_PAYLOAD, sales_tax_rates.reload_in_background)
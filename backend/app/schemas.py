@@ -1,4 +1,4 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Generic, Literal, TypeVar
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
 
@@ -91,6 +91,18 @@ class Customer(CustomerBase):
     class Config:
         orm_mode = True
 
+# CSV import schemas
+class ImportRejectedRow(BaseModel):
+    line: int
+    errors: List[str]
+
+class ImportReport(BaseModel):
+    imported: int
+    rejected: int
+    rejected_rows: List[ImportRejectedRow]
+    elapsed_seconds: float
+    rows_per_second: Optional[float] = None
+
 # Product schemas
 class ProductBase(BaseModel):
     product_code: str
@@ -99,6 +111,7 @@ class ProductBase(BaseModel):
     category: Optional[str] = None
     unit_price: float
     tax_rate: float
+    tax_rate_name: Optional[str] = None
     unit: str
     minimum_quantity: int = 1
     status: str = "active"
@@ -114,6 +127,7 @@ class ProductUpdate(BaseModel):
     category: Optional[str] = None
     unit_price: Optional[float] = None
     tax_rate: Optional[float] = None
+    tax_rate_name: Optional[str] = None
     unit: Optional[str] = None
     minimum_quantity: Optional[int] = None
     status: Optional[str] = None
@@ -140,6 +154,10 @@ class QuotationItemBase(BaseModel):
 class QuotationItemCreate(QuotationItemBase):
     pass
 
+class QuotationItemUpdate(QuotationItemBase):
+    # 既存明細のID。省略時は sort_order で既存明細と照合する
+    id: Optional[str] = None
+
 class QuotationItem(QuotationItemBase):
     id: str
     quotation_id: str
@@ -166,7 +184,9 @@ class QuotationUpdate(BaseModel):
     expiration_date: Optional[datetime] = None
     customer_id: Optional[str] = None
     notes: Optional[str] = None
-    items: Optional[List[QuotationItemCreate]] = None
+    items: Optional[List[QuotationItemUpdate]] = None
+    # replace: 全明細を削除して再登録（既定） / diff: 既存明細との差分のみ反映
+    items_mode: Literal["diff", "replace"] = "replace"
 
 class Quotation(QuotationBase):
     id: str
@@ -198,6 +218,10 @@ class InvoiceItemBase(BaseModel):
 class InvoiceItemCreate(InvoiceItemBase):
     pass
 
+class InvoiceItemUpdate(InvoiceItemBase):
+    # 既存明細のID。省略時は sort_order で既存明細と照合する
+    id: Optional[str] = None
+
 class InvoiceItem(InvoiceItemBase):
     id: str
     invoice_id: str
@@ -246,7 +270,9 @@ class InvoiceUpdate(BaseModel):
     customer_id: Optional[str] = None
     payment_terms: Optional[str] = None
     notes: Optional[str] = None
-    items: Optional[List[InvoiceItemCreate]] = None
+    items: Optional[List[InvoiceItemUpdate]] = None
+    # replace: 全明細を削除して再登録（既定） / diff: 既存明細との差分のみ反映
+    items_mode: Literal["diff", "replace"] = "replace"
 
 class Invoice(InvoiceBase):
     id: str
@@ -254,6 +280,8 @@ class Invoice(InvoiceBase):
     subtotal: float
     tax_amount: float
     total_amount: float
+    amount_paid: float = 0
+    balance_due: Optional[float] = None
     status: str
     payment_status: str
     created_at: datetime
@@ -269,6 +297,38 @@ class Invoice(InvoiceBase):
     class Config:
         orm_mode = True
 
+class InvoiceBatchCreate(BaseModel):
+    invoices: List[InvoiceCreate]
+
+class InvoiceBatchResult(BaseModel):
+    index: int
+    success: bool
+    id: Optional[str] = None
+    invoice_number: Optional[str] = None
+    error: Optional[str] = None
+
+class InvoiceBatchResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[InvoiceBatchResult]
+
+# Bulk workflow transition schemas
+class BulkTransitionRequest(BaseModel):
+    ids: List[str]
+    notes: Optional[str] = None
+
+class BulkApprovalRequest(BulkTransitionRequest):
+    approver_id: str
+
+class BulkTransitionSkipped(BaseModel):
+    id: str
+    status: Optional[str] = None
+    reason: str
+
+class BulkTransitionResponse(BaseModel):
+    transitioned: List[str]
+    skipped: List[BulkTransitionSkipped]
+
 # Tax Rate schemas
 class TaxRateBase(BaseModel):
     rate: float
@@ -363,6 +423,8 @@ class InvoiceSettings(BaseModel):
     default_payment_terms: str
     default_tax_rate: float
     notes_template: Optional[str] = None
+    # 採番のリセット周期: never / yearly / monthly
+    number_reset: str = "never"
 
 class QuotationSettings(BaseModel):
     prefix: str
@@ -370,6 +432,8 @@ class QuotationSettings(BaseModel):
     default_expiration_days: int
     default_tax_rate: float
     notes_template: Optional[str] = None
+    # 採番のリセット周期: never / yearly / monthly
+    number_reset: str = "never"
 
 class EmailSettings(BaseModel):
     smtp_host: str
@@ -409,4 +473,27 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    email: Optional[str] = None 
\ No newline at end of file
+    email: Optional[str] = None
+
+# Pagination schemas
+T = TypeVar("T")
+
+class Pagination(BaseModel):
+    page: Optional[int] = None
+    per_page: int
+    total_items: Optional[int] = None
+    total_pages: Optional[int] = None
+    total_is_estimate: bool = False
+    has_next_page: bool
+    has_prev_page: bool
+    next_cursor: Optional[str] = None
+
+class PageMeta(BaseModel):
+    pagination: Pagination
+    timestamp: datetime
+    request_id: str
+
+class Page(BaseModel, Generic[T]):
+    success: bool = True
+    data: List[T]
+    meta: PageMeta
@@ -0,0 +1,108 @@
+from bisect import bisect_right
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from . import models
+from .reference_data import reference_data
+
+# In-memory interval index over effective-dated tax rates.
+# Rates are grouped into series by TaxRate.name; each series keeps its periods sorted by
+# effective_from, so the rate for a document date is one bisect. A product opts into a
+# series through Product.tax_rate_name; products without one keep using Product.tax_rate.
+# The index is built from the reference data cache and rebuilt when another worker
+# changes tax_rates or the cached rows expire; local create/update apply their change in
+# place instead. Effective dates are naive UTC, so aware document dates are converted.
+
+# (effective_from, effective_to, rate, tax_rate_id)
+Period = Tuple[datetime, Optional[datetime], float, str]
+
+class TaxRateIndex:
+    """
+    税率名ごとの適用期間のソート済み配列。
+    """
+
+    def __init__(self):
+        self._series: Dict[str, List[Period]] = {}
+        self._starts: Dict[str, List[datetime]] = {}
+        self._names: Dict[str, str] = {}
+        self._version: Optional[int] = None
+        self._lock = Lock()
+
+    def _insert(self, tax_rate: models.TaxRate) -> None:
+        if tax_rate.effective_from is None:
+            return
+        period = (tax_rate.effective_from, tax_rate.effective_to, tax_rate.rate, tax_rate.id)
+        series = self._series.setdefault(tax_rate.name, [])
+        series.append(period)
+        series.sort(key=lambda p: p[0])
+        self._starts[tax_rate.name] = [p[0] for p in series]
+        self._names[tax_rate.id] = tax_rate.name
+
+    def _remove(self, tax_rate_id: str) -> None:
+        name = self._names.pop(tax_rate_id, None)
+        if name is None:
+            return
+        self._series[name] = [p for p in self._series[name] if p[3] != tax_rate_id]
+        self._starts[name] = [p[0] for p in self._series[name]]
+
+    def _ensure_current(self) -> None:
+        # rows() reloads an expired snapshot and advances the version, so it is called on
+        # every check (a cache hit while the snapshot is fresh) before comparing versions
+        rows = reference_data.rows("tax_rates")
+        version = reference_data.version("tax_rates")
+        if version == self._version:
+            return
+        series: Dict[str, List[Period]] = {}
+        for t in rows:
+            if t.effective_from is not None:
+                period = (t.effective_from, t.effective_to, t.rate, t.id)
+                series.setdefault(t.name, []).append(period)
+        for periods in series.values():
+            periods.sort(key=lambda p: p[0])
+        with self._lock:
+            self._series = series
+            self._starts = {name: [p[0] for p in periods] for name, periods in series.items()}
+            self._names = {p[3]: name for name, periods in series.items() for p in periods}
+            self._version = version
+
+    def upsert(self, tax_rate: models.TaxRate) -> None:
+        """
+        作成・更新をコミットした税率を索引に反映し、参照データキャッシュを無効化する。
+        索引が最新であれば該当期間のみを差し替え、全体の再構築は行わない。
+        """
+        with self._lock:
+            current = self._version == reference_data.version("tax_rates")
+            reference_data.invalidate("tax_rates")
+            if current:
+                self._remove(tax_rate.id)
+                self._insert(tax_rate)
+                self._version = reference_data.version("tax_rates")
+
+    def resolve(self, name: str, document_date: datetime) -> Optional[float]:
+        """
+        document_date 時点で有効な name の税率を返す。該当する期間がなければ None。
+        """
+        if document_date.tzinfo is not None:
+            document_date = document_date.astimezone(timezone.utc).replace(tzinfo=None)
+        self._ensure_current()
+        with self._lock:
+            starts = self._starts.get(name)
+            if not starts:
+                return None
+            index = bisect_right(starts, document_date) - 1
+            if index < 0:
+                return None
+            effective_from, effective_to, rate, _ = self._series[name][index]
+        if effective_to is not None and document_date >= effective_to:
+            return None
+        return rate
+
+    def rate_for(self, product: models.Product, document_date: Optional[datetime]) -> float:
+        if product.tax_rate_name and document_date is not None:
+            rate = self.resolve(product.tax_rate_name, document_date)
+            if rate is not None:
+                return rate
+        return product.tax_rate
+
+tax_rate_index = TaxRateIndex()
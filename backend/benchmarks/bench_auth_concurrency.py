@@ -0,0 +1,81 @@
+"""
+認証依存関係の並列性の計測。
+
+旧実装（async def 内で同期クエリを実行しイベントループをブロックする）と
+現在の get_current_active_user を同じ条件で比較する。
+旧実装では並列度を上げてもスループットが伸びず、リクエストが直列化される。
+
+    cd backend && python -m benchmarks.bench_auth_concurrency --db-latency 0.005
+"""
+import argparse
+
+from benchmarks.common import print_table, run_load, serve_in_thread
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.auth import create_access_token, get_current_active_user
+from app.database import SessionLocal, get_db
+
+app = FastAPI()
+
+async def blocking_current_user(user_id: str, db: Session = Depends(get_db)):
+    # 旧 get_current_user と同じく、イベントループ上で同期クエリを実行する
+    if app.state.db_latency:
+        db.execute(text("SELECT pg_sleep(:s)"), {"s": app.state.db_latency})
+    return db.query(models.User).filter(models.User.id == user_id).first()
+
+async def simulated_latency():
+    if app.state.db_latency:
+        from app.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": app.state.db_latency})
+
+@app.get("/blocking/me")
+async def read_me_blocking(user: models.User = Depends(blocking_current_user)):
+    return {"id": user.id}
+
+@app.get("/async/me", dependencies=[Depends(simulated_latency)])
+async def read_me_async(user: models.User = Depends(get_current_active_user)):
+    return {"id": user.id}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--total", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--db-latency", type=float, default=0.0, help="追加するDB待ち時間（秒）")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.is_active.is_(True)).first()
+    finally:
+        db.close()
+    if user is None:
+        raise SystemExit("有効なユーザーが存在しません")
+    token = create_access_token({"sub": user.id})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    app.state.db_latency = args.db_latency
+    server = serve_in_thread(app, port=args.port)
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            base = f"http://127.0.0.1:{args.port}"
+            rows.append({
+                "path": "blocking",
+                **run_load(f"{base}/blocking/me?user_id={user.id}", concurrency, args.total),
+            })
+            rows.append({
+                "path": "async",
+                **run_load(f"{base}/async/me", concurrency, args.total, headers),
+            })
+    finally:
+        server.should_exit = True
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+商品 CSV 取り込みのスループット計測。
+
+    cd backend && python -m benchmarks.bench_csv_import --rows 1000 10000 50000
+
+行ごとの crud.create_product（1 行 1 コミット）と、COPY + ステージングテーブル経由の
+csv_import.import_csv を比較する。per_row は計測時間短縮のため最大 --per-row-limit 行で計測する。
+作成したデータは計測後に削除する。
+"""
+import argparse
+import csv
+import io
+import time
+import uuid
+
+from benchmarks.common import print_table
+from benchmarks.seed import BENCH_USER_EMAIL
+
+from app import crud, models, schemas
+from app.csv_import import import_csv
+from app.database import SessionLocal
+
+
+def build_csv(run: str, rows: int) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["product_code", "product_name", "category", "unit_price", "tax_rate", "unit"])
+    for i in range(rows):
+        writer.writerow([f"CSV-{run}-{i:07d}", f"Import product {i}", "bench", 100.0, 0.1, "pcs"])
+    return buffer.getvalue()
+
+def cleanup(db, run: str) -> None:
+    db.query(models.Product).filter(models.Product.product_code.like(f"CSV-{run}-%")).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--per-row-limit", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    rows = []
+    try:
+        user = crud.get_user_by_email(db, BENCH_USER_EMAIL)
+        if user is None:
+            raise SystemExit("先に python -m benchmarks.seed を実行してください")
+
+        for count in args.rows:
+            run = uuid.uuid4().hex[:8]
+            per_row = min(count, args.per_row_limit)
+            started = time.perf_counter()
+            for record in csv.DictReader(io.StringIO(build_csv(f"{run}r", per_row))):
+                crud.create_product(db, schemas.ProductCreate(**record), user.id)
+            per_row_elapsed = time.perf_counter() - started
+
+            report = import_csv(db, "products", io.StringIO(build_csv(run, count)), user.id)
+            rows.append({
+                "rows": count,
+                "per_row_rows_s": per_row / per_row_elapsed,
+                "copy_rows_s": report["rows_per_second"],
+                "copy_s": report["elapsed_seconds"],
+                "rejected": report["rejected"],
+            })
+            cleanup(db, f"{run}r")
+            cleanup(db, run)
+    finally:
+        db.close()
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+明細行数ごとの請求書作成レイテンシと SQL 発行数の計測。
+
+    cd backend && python -m benchmarks.bench_invoice_create --lines 1 10 100 200 1000
+
+商品の解決は明細行数によらず 1 クエリで行われるため、
+発行数は明細の INSERT を除いて一定になる。
+明細の登録は ORM 経由（orm_ms）と一括 INSERT（bulk_ms）の両方で計測する。
+作成したデータは計測後に削除する。
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.common import count_statements, print_table, timeit
+from benchmarks.seed import BENCH_USER_EMAIL
+
+from app import crud, models, schemas
+from app.database import SessionLocal
+
+
+def build_payload(customer_id: str, product_ids, lines: int) -> schemas.InvoiceCreate:
+    now = datetime.utcnow()
+    return schemas.InvoiceCreate(
+        invoice_date=now,
+        due_date=now + timedelta(days=30),
+        customer_id=customer_id,
+        items=[
+            schemas.InvoiceItemCreate(
+                product_id=random.choice(product_ids),
+                quantity=random.randint(1, 10),
+                unit_price=100.0,
+                sort_order=i,
+            )
+            for i in range(lines)
+        ],
+    )
+
+def cleanup(db, invoice_ids) -> None:
+    db.query(models.InvoiceItem).filter(models.InvoiceItem.invoice_id.in_(invoice_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(models.Invoice).filter(models.Invoice.id.in_(invoice_ids)).delete(
+        synchronize_session=False
+    )
+    db.commit()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 10, 100, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    created = []
+    rows = []
+    default_threshold = crud.LINE_ITEM_BULK_THRESHOLD
+    try:
+        user = crud.get_user_by_email(db, BENCH_USER_EMAIL)
+        customer = db.query(models.Customer).first()
+        product_ids = [p.id for p in db.query(models.Product.id).limit(200)]
+        if not (user and customer and product_ids):
+            raise SystemExit("先に python -m benchmarks.seed を実行してください")
+
+        for lines in args.lines:
+            payload = build_payload(customer.id, product_ids, lines)
+
+            def create(payload=payload):
+                created.append(crud.create_invoice(db, payload, user.id).id)
+
+            row = {"lines": lines}
+            for label, threshold in (("orm", lines + 1), ("bulk", 0)):
+                crud.LINE_ITEM_BULK_THRESHOLD = threshold
+                row[f"{label}_statements"] = count_statements(create)
+                row[f"{label}_ms"] = timeit(create, args.repeat) * 1000
+            rows.append(row)
+    finally:
+        crud.LINE_ITEM_BULK_THRESHOLD = default_threshold
+        if created:
+            cleanup(db, created)
+        db.close()
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+GET /invoices/ の同期パス（スレッドプール + get_db）と非同期パス（イベントループ + get_async_db）の
+スループット比較。
+
+    cd backend && python -m benchmarks.bench_invoice_list --total 5000
+
+認証のコストを除くため、一覧取得部分だけを同じレスポンスモデルで公開する専用アプリに対して計測する。
+"""
+import argparse
+from typing import List
+
+from benchmarks.common import print_table, run_load, serve_in_thread
+from fastapi import Depends, FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app import async_crud, crud, schemas
+from app.database import get_async_db, get_db
+
+app = FastAPI()
+
+@app.get("/sync/invoices/", response_model=List[schemas.Invoice])
+def read_invoices_sync(limit: int = 20, db: Session = Depends(get_db)):
+    return crud.get_invoices(db, limit=limit)
+
+@app.get("/async/invoices/", response_model=List[schemas.Invoice])
+async def read_invoices_async(limit: int = 20, db: AsyncSession = Depends(get_async_db)):
+    return await async_crud.get_invoices(db, limit=limit)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--total", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 500])
+    args = parser.parse_args()
+
+    server = serve_in_thread(app, port=args.port)
+    rows = []
+    try:
+        for concurrency in args.concurrency:
+            for path in ("sync", "async"):
+                url = f"http://127.0.0.1:{args.port}/{path}/invoices/?limit={args.limit}"
+                result = run_load(url, concurrency, args.total)
+                rows.append({"path": path, **result})
+    finally:
+        server.should_exit = True
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
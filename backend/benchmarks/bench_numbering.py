@@ -0,0 +1,86 @@
+"""
+請求書番号の並列採番の確認。
+
+複数スレッドから crud.create_invoice を同時に実行し、番号の重複と
+一意制約違反が発生しないこと、およびスループットを確認する。
+
+    cd backend && python -m benchmarks.bench_numbering --invoices 5000 --workers 32
+"""
+import argparse
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from benchmarks.seed import BENCH_USER_EMAIL
+from sqlalchemy.exc import IntegrityError
+
+from app import crud, models, schemas
+from app.database import SessionLocal
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--invoices", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=32)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_email(db, BENCH_USER_EMAIL)
+        customer = db.query(models.Customer).first()
+        product = db.query(models.Product).first()
+    finally:
+        db.close()
+    if not (user and customer and product):
+        raise SystemExit("先に python -m benchmarks.seed を実行してください")
+
+    now = datetime.utcnow()
+    payload = schemas.InvoiceCreate(
+        invoice_date=now,
+        due_date=now + timedelta(days=30),
+        customer_id=customer.id,
+        items=[schemas.InvoiceItemCreate(product_id=product.id, quantity=1, unit_price=100.0)],
+    )
+
+    def create_one(_):
+        session = SessionLocal()
+        try:
+            invoice = crud.create_invoice(session, payload, user.id)
+            return invoice.id, invoice.invoice_number
+        except IntegrityError:
+            session.rollback()
+            return None
+        finally:
+            session.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results = list(executor.map(create_one, range(args.invoices)))
+    elapsed = time.perf_counter() - started
+
+    created = [r for r in results if r is not None]
+    duplicates = [n for n, c in Counter(number for _, number in created).items() if c > 1]
+    print(f"created={len(created)} failed={len(results) - len(created)} "
+          f"duplicates={len(duplicates)} rate={len(created) / elapsed:.1f}/s")
+
+    db = SessionLocal()
+    try:
+        ids = [invoice_id for invoice_id, _ in created]
+        for i in range(0, len(ids), 1000):
+            chunk = ids[i:i + 1000]
+            db.query(models.InvoiceItem).filter(models.InvoiceItem.invoice_id.in_(chunk)).delete(
+                synchronize_session=False
+            )
+            db.query(models.Invoice).filter(models.Invoice.id.in_(chunk)).delete(
+                synchronize_session=False
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    if duplicates or len(created) != len(results):
+        raise SystemExit("採番の重複または作成失敗が発生しました")
+
+if __name__ == "__main__":
+    main()
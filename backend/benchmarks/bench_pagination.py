@@ -0,0 +1,71 @@
+"""
+オフセット方式とキーセット（カーソル）方式のページ取得レイテンシ比較。
+
+    cd backend && python -m benchmarks.bench_pagination --pages 1 10 100 1000
+
+キーセット方式ではページ番号によらずレイテンシが一定になることを確認する。
+"""
+import argparse
+
+from benchmarks.common import print_table, timeit
+
+from app import crud, models
+from app.database import SessionLocal
+from app.pagination import encode_cursor, keyset_order_by
+
+READERS = {
+    "invoices": (crud.get_invoices, models.Invoice),
+    "quotations": (crud.get_quotations, models.Quotation),
+    "customers": (crud.get_customers, models.Customer),
+    "products": (crud.get_products, models.Product),
+}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--list", choices=sorted(READERS), default="invoices")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    reader, model = READERS[args.list]
+    sort_by, sort_order = "created_at", "desc"
+    rows = []
+    db = SessionLocal()
+    try:
+        for page in args.pages:
+            skip = (page - 1) * args.limit
+            cursor = None
+            if skip:
+                # 前ページ末尾の行からカーソルを作る
+                last = (
+                    db.query(model)
+                    .order_by(*keyset_order_by(model, sort_by, sort_order))
+                    .offset(skip - 1)
+                    .first()
+                )
+                if last is None:
+                    print(f"page {page}: データ件数が不足しているためスキップします")
+                    continue
+                cursor = encode_cursor(getattr(last, sort_by), last.id)
+
+            offset_time = timeit(
+                lambda reader=reader, skip=skip: reader(db, skip=skip, limit=args.limit),
+                args.repeat,
+            )
+            cursor_time = timeit(
+                lambda reader=reader, cursor=cursor: reader(db, limit=args.limit, cursor=cursor),
+                args.repeat,
+            )
+            db.expunge_all()
+            rows.append({
+                "page": page,
+                "offset_ms": offset_time * 1000,
+                "cursor_ms": cursor_time * 1000,
+            })
+    finally:
+        db.close()
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
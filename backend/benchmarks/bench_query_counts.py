@@ -0,0 +1,50 @@
+"""
+一覧取得 1 ページあたりの SQL 発行数の確認。
+
+レスポンスモデルへのシリアライズまで含めて発行された SQL を数え、
+ページサイズを変えても発行数が一定（N+1 が発生していない）ことを確認する。
+
+    cd backend && python -m benchmarks.bench_query_counts
+"""
+import argparse
+
+from benchmarks.common import count_statements, print_table
+
+from app import crud, schemas
+from app.database import SessionLocal
+
+# 請求書: 本体 + items + payments（customer は JOIN）
+# 見積書: 本体 + items（customer は JOIN）
+MAX_STATEMENTS = {"invoices": 3, "quotations": 2}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    readers = {
+        "invoices": (crud.get_invoices, schemas.Invoice),
+        "quotations": (crud.get_quotations, schemas.Quotation),
+    }
+    rows = []
+    failed = False
+    for name, (reader, schema) in readers.items():
+        for page_size in args.page_sizes:
+            db = SessionLocal()
+            try:
+                def load_page(db=db, reader=reader, schema=schema, page_size=page_size):
+                    for obj in reader(db, limit=page_size):
+                        schema.from_orm(obj)
+
+                statements = count_statements(load_page)
+            finally:
+                db.close()
+            ok = statements <= MAX_STATEMENTS[name]
+            failed = failed or not ok
+            rows.append({"list": name, "page_size": page_size, "statements": statements, "ok": ok})
+    print_table(rows)
+    if failed:
+        raise SystemExit("1ページあたりの SQL 発行数が上限を超えています")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+売上レポート（GET /api/v1/reports/sales）の集計時間の計測。
+
+    cd backend && python -m benchmarks.seed --invoices 1000000 --years 5
+    cd backend && python -m benchmarks.bench_sales_report
+
+group_by の組み合わせごとに、投入済みの全期間を対象として次を比較する。
+- summary_ms: 月次売上集計テーブルから集計し、結果をすべて書き出すまでの時間
+- sql_ms: 請求書・明細を直接 GROUP BY した場合の時間（use_summary=False）
+- rows: 集計結果の行数
+- within_budget: 両方が設計書のレポート生成目標（5 秒以内）に収まったか
+--client-side を指定すると、従来の方法（請求書一覧を明細ごと全件取得してアプリ側で合計）
+の時間 client_ms も計測する。
+"""
+import argparse
+from collections import defaultdict
+
+from benchmarks.common import print_table, timeit
+from sqlalchemy.orm import selectinload
+
+from app import models
+from app.database import SessionLocal
+from app.reports import iter_report_rows, sales_report_query, stream_report
+
+REPORT_BUDGET_SECONDS = 5.0
+
+GROUPINGS = [
+    ["period"],
+    ["period", "customer"],
+    ["period", "product"],
+    ["period", "customer", "product"],
+]
+
+def client_side_report(group_by):
+    db = SessionLocal()
+    try:
+        totals = defaultdict(float)
+        invoices = (
+            db.query(models.Invoice)
+            .options(selectinload(models.Invoice.items))
+            .filter(models.Invoice.status == "issued")
+            .yield_per(1000)
+        )
+        for invoice in invoices:
+            month = invoice.invoice_date.strftime("%Y-%m")
+            for item in invoice.items:
+                key = (
+                    month,
+                    invoice.customer_id if "customer" in group_by else None,
+                    item.product_id if "product" in group_by else None,
+                )
+                totals[key] += item.total_amount
+        return totals
+    finally:
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--period", default="month")
+    parser.add_argument("--format", choices=["json", "csv"], default="json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--client-side", action="store_true")
+    args = parser.parse_args()
+
+    results = []
+    for group_by in GROUPINGS:
+        summary = sales_report_query(group_by, period=args.period)
+        live = sales_report_query(group_by, period=args.period, use_summary=False)
+        rows = sum(1 for _ in iter_report_rows(live))
+        timings = {
+            name: timeit(
+                lambda query=query: sum(len(chunk) for chunk in stream_report(query, args.format)),
+                repeat=args.repeat,
+            )
+            for name, query in (("summary", summary), ("sql", live))
+        }
+        result = {
+            "group_by": "+".join(group_by),
+            "rows": rows,
+            "summary_ms": timings["summary"] * 1000,
+            "sql_ms": timings["sql"] * 1000,
+            "within_budget": max(timings.values()) <= REPORT_BUDGET_SECONDS,
+        }
+        if args.client_side:
+            result["client_ms"] = timeit(
+                lambda group_by=group_by: client_side_report(group_by), repeat=1
+            ) * 1000
+        results.append(result)
+    print_table(results)
+
+if __name__ == "__main__":
+    main()
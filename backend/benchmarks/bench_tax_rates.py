@@ -0,0 +1,104 @@
+"""
+伝票日付による税率解決のコスト計測。
+
+    cd backend && python -m benchmarks.bench_tax_rates --lines 100 1000 10000 100000
+
+計測用の税率系列（1 年ごとの適用期間を --periods 件）を登録し、次の 3 つを比較する。
+- index_ms: 索引で税率を解決し、明細を計算する時間（crud.resolve_tax_rates + calculate_totals）
+- query_ms: 明細ごとに期間の範囲検索を発行した場合の時間（--query-limit 行まで計測）
+- resolve_us: 索引での 1 回あたりの解決時間
+登録した税率は計測後に削除する。
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.common import print_table, timeit
+from sqlalchemy import text
+
+from app import crud, models
+from app.database import SessionLocal
+from app.reference_data import reference_data
+from app.tax_rates import tax_rate_index
+
+RANGE_QUERY = text(
+    "SELECT rate FROM tax_rates WHERE name = :name AND effective_from <= :date "
+    "AND (effective_to IS NULL OR effective_to > :date) "
+    "ORDER BY effective_from DESC LIMIT 1"
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--periods", type=int, default=50)
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--query-limit", type=int, default=1000)
+    args = parser.parse_args()
+
+    name = f"bench-{uuid.uuid4().hex[:8]}"
+    first_year = 2026 - args.periods
+    db = SessionLocal()
+    try:
+        db.add_all(
+            models.TaxRate(
+                id=str(uuid.uuid4()),
+                name=name,
+                rate=round(0.05 + 0.001 * i, 3),
+                effective_from=datetime(first_year + i, 1, 1),
+                effective_to=datetime(first_year + i + 1, 1, 1),
+            )
+            for i in range(args.periods)
+        )
+        db.commit()
+        reference_data.invalidate("tax_rates")
+
+        products = {
+            str(i): models.Product(id=str(i), tax_rate=0.1, tax_rate_name=name)
+            for i in range(args.products)
+        }
+        dates = [datetime(random.randint(first_year, 2025), 6, 1) for _ in range(1000)]
+        tax_rate_index.resolve(name, dates[0])
+        start = time.perf_counter()
+        for date in dates:
+            tax_rate_index.resolve(name, date)
+        resolve_us = (time.perf_counter() - start) / len(dates) * 1e6
+
+        rows = []
+        for lines in args.lines:
+            items = [
+                SimpleNamespace(
+                    product_id=str(random.randrange(args.products)), quantity=1, unit_price=100.0
+                )
+                for _ in range(lines)
+            ]
+            date = random.choice(dates)
+
+            def with_index(items=items, date=date):
+                referenced = {item.product_id: products[item.product_id] for item in items}
+                crud.calculate_totals(items, crud.resolve_tax_rates(referenced, date))
+
+            def with_queries(items=items, date=date):
+                for _ in items:
+                    db.execute(RANGE_QUERY, {"name": name, "date": date}).scalar()
+
+            rows.append({
+                "lines": lines,
+                "index_ms": timeit(with_index, 3) * 1000,
+                "query_ms": (
+                    timeit(with_queries, 1) * 1000 if lines <= args.query_limit else "-"
+                ),
+                "resolve_us": resolve_us,
+            })
+    finally:
+        db.rollback()
+        db.query(models.TaxRate).filter(models.TaxRate.name == name).delete()
+        db.commit()
+        reference_data.invalidate("tax_rates")
+        db.close()
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+リクエストごとの認証処理（トークン検証 + ユーザー解決）のオーバーヘッド計測。
+
+    cd backend && python -m benchmarks.bench_token_decode --calls 20000
+
+ユーザーは principal キャッシュに載せた状態で get_current_user を直接呼び出し、
+トークンキャッシュ無効（毎回 jwt.decode）と有効の場合の 1 回あたりの時間を比較する。
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import print_table
+
+from app import auth, models
+from app.database import AsyncSessionLocal, SessionLocal
+
+
+async def measure(token: str, calls: int) -> float:
+    async with AsyncSessionLocal() as db:
+        await auth.get_current_user(token=token, db=db)
+        start = time.perf_counter()
+        for _ in range(calls):
+            await auth.get_current_user(token=token, db=db)
+        return (time.perf_counter() - start) / calls
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter(models.User.is_active.is_(True)).first()
+    finally:
+        db.close()
+    if user is None:
+        raise SystemExit("有効なユーザーが存在しません")
+    token = auth.create_access_token(auth.token_claims(user))
+
+    rows = []
+    maxsize = auth.token_cache.maxsize
+    try:
+        for label, size in (("uncached", 0), ("cached", maxsize)):
+            auth.token_cache.maxsize = size
+            auth.token_cache.clear()
+            hits, misses = auth.token_cache.hits, auth.token_cache.misses
+            per_call = asyncio.run(measure(token, args.calls))
+            hits = auth.token_cache.hits - hits
+            misses = auth.token_cache.misses - misses
+            rows.append({
+                "token_cache": label,
+                "per_request_us": per_call * 1e6,
+                "hit_rate": hits / (hits + misses),
+            })
+    finally:
+        auth.token_cache.maxsize = maxsize
+    print_table(rows)
+
+if __name__ == "__main__":
+    main()
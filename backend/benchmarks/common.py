@@ -0,0 +1,107 @@
+"""
+ベンチマーク共通ユーティリティ
+
+backend ディレクトリから `python -m benchmarks.<name>` の形式で実行する。
+DATABASE_URL で指定されたデータベースに接続するため、本番データベースには実行しないこと。
+"""
+import asyncio
+import statistics
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import uvicorn
+from sqlalchemy import event
+
+from app.database import engine
+
+
+def serve_in_thread(app, host: str = "127.0.0.1", port: int = 8765) -> uvicorn.Server:
+    """
+    uvicorn をバックグラウンドスレッドで起動し、起動完了まで待つ。
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+async def _run_load(
+    url: str, concurrency: int, total: int, headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                start = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def run_load(
+    url: str, concurrency: int, total: int, headers: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    url に対して concurrency 並列で合計 total 回の GET を送り、スループットとレイテンシを返す。
+    """
+    return asyncio.run(_run_load(url, concurrency, total, headers))
+
+def timeit(fn: Callable[[], Any], repeat: int = 5) -> float:
+    """
+    fn を repeat 回実行し、最小の実行時間（秒）を返す。
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def count_statements(fn: Callable[[], Any]) -> int:
+    """
+    fn の実行中に同期エンジンで発行された SQL 文の数を返す。
+    """
+    count = 0
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        nonlocal count
+        count += 1
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return count
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        return
+    keys = list(rows[0].keys())
+    print(" | ".join(f"{k:>12}" for k in keys))
+    for row in rows:
+        cells = (row[k] for k in keys)
+        print(" | ".join(f"{v:>12.2f}" if isinstance(v, float) else f"{str(v):>12}" for v in cells))
@@ -0,0 +1,106 @@
+"""
+crud の読み取りクエリに対する EXPLAIN の確認。
+
+各 crud 関数が発行した SQL をそのままのパラメータで EXPLAIN し、
+使用されたインデックスと、大きなテーブルへのシーケンシャルスキャンの有無を表示する。
+事前に `python -m benchmarks.seed` でデータを投入し、ANALYZE を実行しておくこと。
+
+    cd backend && python -m benchmarks.explain_queries
+"""
+import argparse
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import event, text
+
+from app import crud, models
+from app.database import SessionLocal, engine
+
+# シーケンシャルスキャンを許容する小さなテーブル
+SMALL_TABLES = {"users", "tax_rates", "payment_terms", "email_templates", "system_settings"}
+
+def capture_statements(fn: Callable[[], Any]) -> List[Tuple[str, Any]]:
+    captured: List[Tuple[str, Any]] = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return captured
+
+def walk(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+def explain(statement: str, parameters: Any) -> Dict[str, Any]:
+    with engine.connect() as conn:
+        row = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).first()
+    plan = row[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+def scenarios(db) -> Dict[str, Callable[[], Any]]:
+    sample_invoice = db.query(models.Invoice).first()
+    sample_quotation = db.query(models.Quotation).first()
+    invoice_id = sample_invoice.id if sample_invoice else ""
+    quotation_id = sample_quotation.id if sample_quotation else ""
+    customer_id = sample_invoice.customer_id if sample_invoice else ""
+    approver_id = sample_invoice.approver_id if sample_invoice else ""
+    return {
+        "get_invoices": lambda: crud.get_invoices(db, limit=50),
+        "get_invoices(status)": lambda: crud.get_invoices(db, limit=50, status="issued"),
+        "get_invoices(customer)": lambda: crud.get_invoices(db, limit=50, customer_id=customer_id),
+        "get_invoice": lambda: crud.get_invoice(db, invoice_id),
+        "get_quotations": lambda: crud.get_quotations(db, limit=50),
+        "get_quotations(status)": lambda: crud.get_quotations(db, limit=50, status="approved"),
+        "get_quotations(customer)": lambda: crud.get_quotations(
+            db, limit=50, customer_id=customer_id
+        ),
+        "get_quotation": lambda: crud.get_quotation(db, quotation_id),
+        "get_customers": lambda: crud.get_customers(db, limit=50, status="active"),
+        "get_products": lambda: crud.get_products(db, limit=50, status="active"),
+        "pending invoices by approver": lambda: db.query(models.Invoice).filter(
+            models.Invoice.approver_id == approver_id,
+            models.Invoice.status == "pending_approval",
+        ).all(),
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true", help="プラン全体を表示する")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+    problems = 0
+    db = SessionLocal()
+    try:
+        for name, fn in scenarios(db).items():
+            db.expunge_all()
+            for statement, parameters in capture_statements(fn):
+                plan = explain(statement, parameters)
+                nodes = list(walk(plan))
+                indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+                seq_scans = sorted({
+                    n["Relation Name"] for n in nodes
+                    if n["Node Type"] == "Seq Scan" and n["Relation Name"] not in SMALL_TABLES
+                })
+                status = "OK" if not seq_scans else "SEQ SCAN"
+                problems += bool(seq_scans)
+                print(f"[{status}] {name}: indexes={indexes} seq_scans={seq_scans}")
+                if args.verbose:
+                    print(json.dumps(plan, indent=2))
+    finally:
+        db.close()
+    if problems:
+        raise SystemExit(f"{problems} 件のクエリでシーケンシャルスキャンが発生しています")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+ベンチマーク用データの投入。
+
+    cd backend && python -m benchmarks.seed --invoices 100000 --items-per-document 5
+
+既存データは削除しない。検証用データベースでのみ実行すること。
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import models
+from app.database import SessionLocal, engine
+from app.hashing import get_password_hash
+from app.sales_summary import rebuild
+
+BENCH_USER_EMAIL = "bench-admin@example.com"
+BENCH_USER_PASSWORD = "bench-password"
+
+INVOICE_STATUSES = ["draft", "pending_approval", "approved", "issued"]
+QUOTATION_STATUSES = ["draft", "pending_approval", "approved"]
+
+def _chunks(rows, size=5000):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _insert(conn, model, rows):
+    for chunk in _chunks(rows):
+        conn.execute(insert(model), chunk)
+
+def _ensure_user(conn) -> str:
+    existing = conn.execute(
+        models.User.__table__.select().where(models.User.email == BENCH_USER_EMAIL)
+    ).first()
+    if existing:
+        return existing.id
+    user_id = str(uuid.uuid4())
+    conn.execute(insert(models.User), [{
+        "id": user_id,
+        "email": BENCH_USER_EMAIL,
+        "first_name": "Bench",
+        "last_name": "Admin",
+        "hashed_password": get_password_hash(BENCH_USER_PASSWORD),
+        "is_active": True,
+        "create_quote_permission": True,
+        "approve_quote_permission": True,
+        "manage_order_permission": True,
+        "create_invoice_permission": True,
+        "approve_invoice_permission": True,
+        "manage_revenue_permission": True,
+        "admin_permission": True,
+    }])
+    return user_id
+
+def _items(parent_key, parent_id, products, count, created_at):
+    items = []
+    for sort_order in range(count):
+        product = random.choice(products)
+        quantity = random.randint(1, 20)
+        subtotal = quantity * product["unit_price"]
+        tax_amount = subtotal * product["tax_rate"]
+        items.append({
+            "id": str(uuid.uuid4()),
+            parent_key: parent_id,
+            "product_id": product["id"],
+            "quantity": quantity,
+            "unit_price": product["unit_price"],
+            "subtotal": subtotal,
+            "tax_rate": product["tax_rate"],
+            "tax_amount": tax_amount,
+            "total_amount": subtotal + tax_amount,
+            "sort_order": sort_order,
+            "created_at": created_at,
+        })
+    return items
+
+def seed(customers: int, products: int, invoices: int, quotations: int, items: int, years: int):
+    random.seed(42)
+    now = datetime.utcnow()
+    span = timedelta(days=365 * years).total_seconds()
+    run = uuid.uuid4().hex[:6].upper()
+
+    def created_at():
+        return now - timedelta(seconds=random.random() * span)
+
+    with engine.begin() as conn:
+        user_id = _ensure_user(conn)
+
+        customer_rows = [{
+            "id": str(uuid.uuid4()),
+            "company_name": f"Bench Customer {run}-{i}",
+            "status": random.choice(["active", "active", "active", "inactive"]),
+            "created_at": created_at(),
+            "created_by": user_id,
+        } for i in range(customers)]
+        _insert(conn, models.Customer, customer_rows)
+
+        product_rows = [{
+            "id": str(uuid.uuid4()),
+            "product_code": f"BENCH-{run}-{i:06d}",
+            "product_name": f"Bench Product {i}",
+            "category": random.choice(["software", "service", "hardware"]),
+            "unit_price": round(random.uniform(10, 1000), 2),
+            "tax_rate": random.choice([0.0, 0.05, 0.0725, 0.1]),
+            "unit": "ea",
+            "minimum_quantity": 1,
+            "status": "active",
+            "created_at": created_at(),
+            "created_by": user_id,
+        } for i in range(products)]
+        _insert(conn, models.Product, product_rows)
+
+        for kind, count in (("invoice", invoices), ("quotation", quotations)):
+            headers, lines = [], []
+            for i in range(count):
+                doc_id = str(uuid.uuid4())
+                doc_created = created_at()
+                doc_items = _items(f"{kind}_id", doc_id, product_rows, items, doc_created)
+                subtotal = sum(item["subtotal"] for item in doc_items)
+                tax_amount = sum(item["tax_amount"] for item in doc_items)
+                header = {
+                    "id": doc_id,
+                    "customer_id": random.choice(customer_rows)["id"],
+                    "subtotal": subtotal,
+                    "tax_amount": tax_amount,
+                    "total_amount": subtotal + tax_amount,
+                    "created_at": doc_created,
+                    "created_by": user_id,
+                    "approver_id": user_id,
+                }
+                if kind == "invoice":
+                    header.update({
+                        "invoice_number": f"BENCH-{run}-{i:07d}",
+                        "invoice_date": doc_created,
+                        "due_date": doc_created + timedelta(days=30),
+                        "status": random.choice(INVOICE_STATUSES),
+                        "payment_status": "unpaid",
+                        "amount_paid": 0,
+                        "balance_due": subtotal + tax_amount,
+                    })
+                else:
+                    header.update({
+                        "quotation_number": f"BQ-{run}-{i:07d}",
+                        "quotation_date": doc_created,
+                        "expiration_date": doc_created + timedelta(days=30),
+                        "status": random.choice(QUOTATION_STATUSES),
+                    })
+                headers.append(header)
+                lines.extend(doc_items)
+            model = models.Invoice if kind == "invoice" else models.Quotation
+            item_model = models.InvoiceItem if kind == "invoice" else models.QuotationItem
+            _insert(conn, model, headers)
+            _insert(conn, item_model, lines)
+
+    # 請求書を直接投入したため、月次売上集計は再構築する
+    db = SessionLocal()
+    try:
+        rebuild(db)
+    finally:
+        db.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--invoices", type=int, default=20000)
+    parser.add_argument("--quotations", type=int, default=5000)
+    parser.add_argument("--items-per-document", type=int, default=5)
+    parser.add_argument("--years", type=int, default=3)
+    args = parser.parse_args()
+    seed(args.customers, args.products, args.invoices, args.quotations,
+         args.items_per_document, args.years)
+
+if __name__ == "__main__":
+    main()
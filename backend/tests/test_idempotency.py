@@ -0,0 +1,50 @@
+"""
+Idempotency-Key 付きの入金登録のテスト。
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth import get_current_active_user
+from app.main import app
+
+PAYMENT = {
+    "payment_date": "2024-05-10T00:00:00",
+    "payment_amount": 50.0,
+    "payment_method": "bank_transfer",
+}
+
+@pytest.fixture
+def client(db, user):
+    user.manage_revenue_permission = True
+    db.commit()
+    app.dependency_overrides[get_current_active_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def post_payment(client, invoice_id, key="key-1"):
+    return client.post(
+        f"/api/v1/invoices/{invoice_id}/payments",
+        json=PAYMENT,
+        headers={"Idempotency-Key": key},
+    )
+
+def test_missing_invoice_returns_404_and_releases_the_key(client):
+    assert post_payment(client, "missing").status_code == 404
+    assert post_payment(client, "missing").status_code == 404
+
+def test_payment_on_unissued_invoice_returns_400(client, make_invoice):
+    invoice = make_invoice()
+    assert post_payment(client, invoice.id).status_code == 400
+
+def test_replay_returns_the_first_payment(db, client, make_invoice):
+    invoice = make_invoice()
+    invoice.status = "issued"
+    db.commit()
+
+    first = post_payment(client, invoice.id)
+    replay = post_payment(client, invoice.id)
+
+    assert first.status_code == 200
+    assert replay.json() == first.json()
+    db.refresh(invoice)
+    assert invoice.amount_paid == PAYMENT["payment_amount"]
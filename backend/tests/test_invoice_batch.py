@@ -0,0 +1,33 @@
+"""
+請求書の一括作成で、データベースエラーになった請求書だけが失敗することを確認する。
+"""
+import pytest
+from conftest import invoice_payload
+from sqlalchemy import text
+
+from app import crud
+
+CONSTRAINT = "ck_test_invoices_notes"
+
+@pytest.fixture
+def rejecting_constraint(database):
+    with database.begin() as conn:
+        conn.execute(
+            text(f"ALTER TABLE invoices ADD CONSTRAINT {CONSTRAINT} CHECK (notes <> 'reject')")
+        )
+    yield
+    with database.begin() as conn:
+        conn.execute(text(f"ALTER TABLE invoices DROP CONSTRAINT {CONSTRAINT}"))
+
+def test_failed_chunk_is_retried_per_invoice(
+    db, user, customer, products, rejecting_constraint
+):
+    payloads = [invoice_payload(customer.id, products, lines=2) for _ in range(5)]
+    payloads[2].notes = "reject"
+
+    results = crud.create_invoices_batch(db, payloads, user.id, chunk_size=5)
+
+    assert [result["success"] for result in results] == [True, True, False, True, True]
+    assert CONSTRAINT in results[2]["error"]
+    numbers = [result["invoice_number"] for result in results if result["success"]]
+    assert len(set(numbers)) == 4
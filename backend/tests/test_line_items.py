@@ -0,0 +1,67 @@
+"""
+明細更新の diff / replace モードが同じ入力に対して同じ金額になることを確認する。
+"""
+from datetime import datetime
+
+import pytest
+from conftest import invoice_payload
+
+from app import crud, schemas
+
+CHANGE_DATE = datetime(2024, 6, 1)
+
+@pytest.fixture
+def rated_products(db, user):
+    for rate, start, end in [(0.08, datetime(2020, 1, 1), CHANGE_DATE), (0.1, CHANGE_DATE, None)]:
+        crud.create_tax_rate(
+            db,
+            schemas.TaxRateCreate(
+                name="standard", rate=rate, effective_from=start, effective_to=end
+            ),
+            user.id,
+        )
+    return [
+        crud.create_product(
+            db,
+            schemas.ProductCreate(
+                product_code=f"RATED-{i}",
+                product_name=f"Rated Product {i}",
+                unit_price=100.0 * (i + 1),
+                tax_rate=0.1,
+                tax_rate_name="standard",
+                unit="ea",
+                minimum_quantity=1,
+            ),
+            user_id=user.id,
+        )
+        for i in range(2)
+    ]
+
+def test_diff_update_rerates_unchanged_lines_when_the_date_changes(
+    db, user, customer, rated_products
+):
+    totals = {}
+    for mode in ("diff", "replace"):
+        invoice = crud.create_invoice(
+            db, invoice_payload(customer.id, rated_products, lines=2), user.id
+        )
+        items = [
+            schemas.InvoiceItemUpdate(
+                id=item.id,
+                product_id=item.product_id,
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                sort_order=item.sort_order,
+            )
+            for item in invoice.items
+        ]
+        updated = crud.update_invoice(
+            db,
+            invoice.id,
+            schemas.InvoiceUpdate(invoice_date=datetime(2024, 7, 1), items=items, items_mode=mode),
+            user.id,
+        )
+        totals[mode] = (updated.subtotal, updated.tax_amount, updated.total_amount)
+        assert sorted(item.tax_rate for item in updated.items) == [0.1, 0.1]
+
+    assert totals["diff"] == pytest.approx(totals["replace"])
@@ -0,0 +1,36 @@
+"""
+請求書番号の採番が並行実行でも重複しないことを確認する。
+"""
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from conftest import invoice_payload
+
+from app import crud
+from app.database import SessionLocal
+
+WORKERS = 8
+INVOICES_PER_WORKER = 5
+
+def test_parallel_create_invoice_allocates_unique_numbers(db, user, customer, products):
+    payload = invoice_payload(customer.id, products, lines=1)
+    # 全スレッドが揃ってから作成を始め、採番の競合を起こす
+    start = Barrier(WORKERS)
+
+    def create_invoices():
+        session = SessionLocal()
+        try:
+            start.wait()
+            return [
+                crud.create_invoice(session, payload, user.id).invoice_number
+                for _ in range(INVOICES_PER_WORKER)
+            ]
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        futures = [executor.submit(create_invoices) for _ in range(WORKERS)]
+        numbers = [number for future in futures for number in future.result()]
+
+    assert len(numbers) == WORKERS * INVOICES_PER_WORKER
+    assert len(set(numbers)) == len(numbers)
@@ -0,0 +1,38 @@
+"""
+カーソル方式のページングで、並び替え列に NULL を含む場合も全件を
+重複・欠落なく、OFFSET 方式と同じ順序で取得できることを確認する。
+"""
+import pytest
+
+from app import crud, schemas
+from app.pagination import next_cursor
+
+
+@pytest.fixture
+def customers(db, user):
+    for i in range(7):
+        # 3 件に 1 件は email を持たない
+        email = None if i % 3 == 0 else f"customer-{i}@example.com"
+        crud.create_customer(
+            db,
+            schemas.CustomerCreate(company_name=f"Customer {i}", email=email),
+            user_id=user.id,
+        )
+
+@pytest.mark.parametrize("sort_order", ["asc", "desc"])
+@pytest.mark.parametrize("page_size", [1, 2, 3])
+def test_cursor_pages_cover_nullable_sort_column(db, customers, sort_order, page_size):
+    expected = [
+        c.id for c in crud.get_customers(db, limit=100, sort_by="email", sort_order=sort_order)
+    ]
+    seen = []
+    cursor = None
+    while True:
+        page = crud.get_customers(
+            db, limit=page_size, sort_by="email", sort_order=sort_order, cursor=cursor
+        )
+        seen += [c.id for c in page]
+        cursor = next_cursor(page, "email", page_size)
+        if cursor is None:
+            break
+    assert seen == expected
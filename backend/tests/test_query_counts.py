@@ -0,0 +1,50 @@
+"""
+一覧取得 1 ページあたりの SQL 発行数の回帰テスト。
+
+レスポンスモデルへのシリアライズまで含めて発行された SQL を数え、
+ページサイズによらず上限以内（N+1 が発生していない）であることを確認する。
+"""
+import pytest
+from benchmarks.bench_query_counts import MAX_STATEMENTS
+from benchmarks.common import count_statements
+
+from app import crud, schemas
+
+
+@pytest.fixture
+def documents(db, user, customer, products, make_invoice):
+    for _ in range(12):
+        invoice = make_invoice(lines=3)
+        crud.create_quotation(
+            db,
+            schemas.QuotationCreate(
+                quotation_date=invoice.invoice_date,
+                expiration_date=invoice.due_date,
+                customer_id=customer.id,
+                items=[
+                    schemas.QuotationItemCreate(
+                        product_id=product.id, quantity=1, unit_price=product.unit_price
+                    )
+                    for product in products
+                ],
+            ),
+            user.id,
+        )
+    db.expunge_all()
+
+@pytest.mark.parametrize("page_size", [1, 5, 10])
+@pytest.mark.parametrize(
+    "name, reader, schema",
+    [
+        ("invoices", crud.get_invoices, schemas.Invoice),
+        ("quotations", crud.get_quotations, schemas.Quotation),
+    ],
+)
+def test_list_page_statement_count_is_bounded(db, documents, name, reader, schema, page_size):
+    def load_page():
+        page = reader(db, limit=page_size)
+        assert len(page) == page_size
+        for obj in page:
+            schema.model_validate(obj, from_attributes=True)
+
+    assert count_statements(load_page) <= MAX_STATEMENTS[name]
@@ -0,0 +1,70 @@
+"""
+売上レポートの集計テーブル経由と請求書からの直接集計が同じ結果を返すことを確認する。
+"""
+import json
+from datetime import datetime
+
+import pytest
+from conftest import invoice_payload
+
+from app import crud, schemas
+from app.reports import covered_by_summary, sales_report_query, stream_report
+
+GROUPINGS = [
+    ["period"],
+    ["period", "customer"],
+    ["period", "product"],
+    ["customer", "product"],
+    ["product"],
+]
+
+@pytest.fixture
+def issued_invoices(db, user, customer):
+    other = crud.create_customer(
+        db, schemas.CustomerCreate(company_name="Other Customer"), user_id=user.id
+    )
+    # 合計が浮動小数点の加算順序に左右されないよう、二進で正確に表せる金額にする
+    products = [
+        crud.create_product(
+            db,
+            schemas.ProductCreate(
+                product_code=f"REPORT-{i}",
+                product_name=f"Report Product {i}",
+                unit_price=100.0 * (i + 1),
+                tax_rate=0.25,
+                unit="ea",
+                minimum_quantity=1,
+            ),
+            user_id=user.id,
+        )
+        for i in range(3)
+    ]
+    for month in (3, 4, 4, 7):
+        for target in (customer, other):
+            payload = invoice_payload(target.id, products, lines=month % 3 + 1)
+            payload.invoice_date = datetime(2024, month, 10)
+            invoice = crud.create_invoice(db, payload, user.id)
+            invoice.status = "approved"
+            db.commit()
+            crud.issue_invoice(db, invoice.id, user.id)
+
+    # 顧客・商品が NULL の行はどちらの経路でも集計しない
+    orphan = crud.create_invoice(db, invoice_payload(customer.id, products, lines=2), user.id)
+    orphan.customer_id = None
+    orphan.items[0].product_id = None
+    orphan.status = "approved"
+    db.commit()
+    crud.issue_invoice(db, orphan.id, user.id)
+
+@pytest.mark.parametrize("period", ["month", "quarter"])
+@pytest.mark.parametrize("group_by", GROUPINGS)
+def test_summary_report_matches_live_aggregation(issued_invoices, group_by, period):
+    assert covered_by_summary(period, None, None)
+
+    summary = "".join(stream_report(sales_report_query(group_by, period), "json"))
+    live = "".join(
+        stream_report(sales_report_query(group_by, period, use_summary=False), "json")
+    )
+
+    assert json.loads(summary)
+    assert summary == live
@@ -0,0 +1,51 @@
+"""
+適用期間付き税率の索引（tax_rate_index）のテスト。
+"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import update
+
+from app import crud, models, schemas
+from app.reference_data import reference_data
+from app.tax_rates import tax_rate_index
+
+CHANGE_DATE = datetime(2024, 6, 1)
+
+@pytest.fixture
+def tax_rates(db, user):
+    return [
+        crud.create_tax_rate(
+            db,
+            schemas.TaxRateCreate(
+                name="standard", rate=rate, effective_from=start, effective_to=end
+            ),
+            user.id,
+        )
+        for rate, start, end in [
+            (0.08, datetime(2020, 1, 1), CHANGE_DATE),
+            (0.1, CHANGE_DATE, None),
+        ]
+    ]
+
+def test_resolve_accepts_timezone_aware_dates(tax_rates):
+    jst = timezone(timedelta(hours=9))
+    # 2024-06-01 08:00 JST は UTC では変更前日
+    assert tax_rate_index.resolve("standard", datetime(2024, 6, 1, 8, tzinfo=jst)) == 0.08
+    assert tax_rate_index.resolve("standard", datetime(2024, 6, 1, 9, tzinfo=jst)) == 0.1
+    assert tax_rate_index.resolve("standard", CHANGE_DATE - timedelta(seconds=1)) == 0.08
+
+def test_resolve_picks_up_changes_after_the_cache_expires(db, tax_rates, monkeypatch):
+    assert tax_rate_index.resolve("standard", CHANGE_DATE) == 0.1
+
+    # 通知を伴わない他のワーカーからの変更
+    db.execute(
+        update(models.TaxRate).where(models.TaxRate.id == tax_rates[1].id).values(rate=0.12)
+    )
+    db.commit()
+    assert tax_rate_index.resolve("standard", CHANGE_DATE) == 0.1
+
+    expired = time.monotonic() + reference_data.ttl + 1
+    monkeypatch.setattr(time, "monotonic", lambda: expired)
+    assert tax_rate_index.resolve("standard", CHANGE_DATE) == 0.12